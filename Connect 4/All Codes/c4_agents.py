@@ -0,0 +1,264 @@
+import hashlib
+import math
+import random
+
+from c4_board import (AI_PIECE, COLUMN_COUNT, MonteCarloTreeSearch, h_minimax, mcts_move, minimax, pick_best_move,
+                      position_key, random_move)
+from c4_mcts import FlatMonteCarloSearch, HybridMonteCarloSearch, TreeMonteCarloSearch
+from c4_rollout import HeavyRollout, fast_mcts_move, playout_buffer_size
+from c4_search import fast_h_minimax, fast_minimax
+
+# The engines of the match scripts behind one interface, built from spec
+# strings such as "minimax:5" or "h_minimax:5:8": agent.move(board, piece,
+# rng, stats) returns (column, score), score being None for engines without
+# one. All of an engine's randomness comes from `rng`, a random.Random or
+# the random module itself, and its work is counted in `stats`, a
+# c4_stats.SearchStats, when one is given.
+
+
+def derive_seed(*parts):
+    # A stable 64-bit seed from any printable values (hash() of a str changes
+    # between processes)
+    text = ":".join(str(part) for part in parts)
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+def h_minimax_depth(depth, depth_limit):
+    # h_minimax() stops where the remaining depth reaches depth_limit
+    return depth - depth_limit if depth >= depth_limit else depth
+
+
+class Agent:
+    name = None
+    defaults = ()
+    # True for engines whose move is a function of the position: the rng
+    # only picks a provisional column that the search always replaces.
+    # Only these can be cached, see CachedAgent.
+    deterministic = False
+    # Smallest allowed value of each parameter, None where any value works
+    minimums = ()
+
+    def __init__(self, *params, seed=None):
+        if len(params) > len(self.defaults):
+            raise ValueError(f"{self.name} takes at most {len(self.defaults)} parameters")
+        self.params = tuple(params) + self.defaults[len(params):]
+        for i, (value, minimum) in enumerate(zip(self.params, self.minimums)):
+            if minimum is not None and value < minimum:
+                raise ValueError(f"{self.config}: parameter {i + 1} must be at least {minimum}")
+        # With a seed every decision ignores the rng it is given and runs on
+        # one seeded from (seed, config, position, piece), so the same
+        # position always gets the same move.
+        self.seed = seed
+
+    @property
+    def config(self):
+        return ":".join(str(part) for part in (self.name,) + self.params)
+
+    def __repr__(self):
+        return self.config
+
+    def move(self, board, piece, rng=random, stats=None):
+        if self.seed is not None:
+            rng = random.Random(derive_seed(self.seed, self.config, position_key(board), piece))
+        return self.search(board, piece, rng, stats)
+
+    def search(self, board, piece, rng, stats):
+        raise NotImplementedError
+
+
+class RandomAgent(Agent):
+    name = "random"
+
+    def search(self, board, piece, rng, stats):
+        return random_move(board, rng), None
+
+
+class GreedyAgent(Agent):
+    name = "greedy"
+    deterministic = True
+
+    def search(self, board, piece, rng, stats):
+        return pick_best_move(board, piece, rng, stats), None
+
+
+class MinimaxAgent(Agent):
+    # minimax() always maximizes AI_PIECE, so PLAYER_PIECE minimizes
+    name = "minimax"
+    deterministic = True
+    defaults = (5,)
+    minimums = (1,)
+
+    def search(self, board, piece, rng, stats):
+        depth, = self.params
+        if stats is not None:
+            stats.add_search(depth)
+        return minimax(board, depth, -math.inf, math.inf, piece == AI_PIECE, rng=rng, stats=stats)
+
+
+class HMinimaxAgent(Agent):
+    name = "h_minimax"
+    deterministic = True
+    defaults = (5, 6)
+    minimums = (1, None)
+
+    def __init__(self, *params, seed=None):
+        super().__init__(*params, seed=seed)
+        depth, depth_limit = self.params
+        if depth == depth_limit:
+            # h_minimax() would stop at the root without a column
+            raise ValueError(f"{self.config}: depth must differ from depth_limit")
+
+    def search(self, board, piece, rng, stats):
+        depth, depth_limit = self.params
+        if stats is not None:
+            stats.add_search(h_minimax_depth(depth, depth_limit))
+        return h_minimax(board, depth, -math.inf, math.inf, piece == AI_PIECE, depth_limit, rng=rng, stats=stats)
+
+
+class FastMinimaxAgent(Agent):
+    name = "fast_minimax"
+    deterministic = True
+    defaults = (5,)
+    minimums = (1,)
+
+    def search(self, board, piece, rng, stats):
+        depth, = self.params
+        if stats is not None:
+            stats.add_search(depth)
+        return fast_minimax(board, depth, -math.inf, math.inf, piece == AI_PIECE, rng, stats)
+
+
+class FastHMinimaxAgent(HMinimaxAgent):
+    name = "fast_h_minimax"
+
+    def search(self, board, piece, rng, stats):
+        depth, depth_limit = self.params
+        if stats is not None:
+            stats.add_search(h_minimax_depth(depth, depth_limit))
+        return fast_h_minimax(board, depth, -math.inf, math.inf, piece == AI_PIECE, depth_limit, rng, stats)
+
+
+class MCTSAgent(Agent):
+    name = "mcts"
+    defaults = (100,)
+    minimums = (1,)
+
+    def search(self, board, piece, rng, stats):
+        n_simulations, = self.params
+        return mcts_move(board, piece, n_simulations, rng, stats), None
+
+
+class FastMCTSAgent(Agent):
+    name = "fast_mcts"
+    defaults = (100,)
+    minimums = (1,)
+
+    def search(self, board, piece, rng, stats):
+        n_simulations, = self.params
+        return fast_mcts_move(board, piece, n_simulations, rng=rng, stats=stats), None
+
+
+class FlatMCAgent(Agent):
+    # MonteCarloTreeSearch of the random-vs-mcts scripts (1000 playouts)
+    name = "flat_mc"
+
+    def search(self, board, piece, rng, stats):
+        return MonteCarloTreeSearch(board, piece, rng, stats).get_best_move(), None
+
+
+class FastFlatMCAgent(Agent):
+    name = "fast_flat_mc"
+    defaults = (1000,)
+    minimums = (1,)
+
+    def search(self, board, piece, rng, stats):
+        sim_count, = self.params
+        return FlatMonteCarloSearch(board, piece, sim_count, rng=rng, stats=stats).get_best_move(), None
+
+
+class HeavyMCAgent(Agent):
+    name = "heavy_mc"
+    defaults = (50,)
+    minimums = (1,)
+
+    def search(self, board, piece, rng, stats):
+        sim_count, = self.params
+        # Heavy playouts take two draws per ply
+        rollout = HeavyRollout(buffer_size=playout_buffer_size(board, sim_count * COLUMN_COUNT, 2), rng=rng)
+        search = FlatMonteCarloSearch(board, piece, sim_count, rollout, rng, stats)
+        return search.get_best_move(), None
+
+
+class UCTAgent(Agent):
+    # A fresh tree per move keeps the decision a function of the position.
+    # Each iteration adds at most one node, so iterations + 1 never fill up.
+    name = "uct"
+    defaults = (1000,)
+    minimums = (1,)
+
+    def search(self, board, piece, rng, stats):
+        iterations, = self.params
+        search = TreeMonteCarloSearch(board, piece, iterations, max_nodes=iterations + 1, reuse_tree=False, rng=rng,
+                                      stats=stats)
+        return search.get_best_move(), None
+
+
+class HybridAgent(Agent):
+    name = "hybrid"
+    defaults = (1000, 3)
+    minimums = (1, 1)
+
+    def search(self, board, piece, rng, stats):
+        iterations, minimax_depth = self.params
+        search = HybridMonteCarloSearch(board, piece, iterations, minimax_depth, max_nodes=iterations + 1,
+                                        reuse_tree=False, rng=rng, stats=stats)
+        return search.get_best_move(), None
+
+
+AGENTS = {cls.name: cls for cls in (RandomAgent, GreedyAgent, MinimaxAgent, HMinimaxAgent, FastMinimaxAgent,
+                                    FastHMinimaxAgent, MCTSAgent, FastMCTSAgent, FlatMCAgent, FastFlatMCAgent,
+                                    HeavyMCAgent, UCTAgent, HybridAgent)}
+
+
+def make_agent(spec, seed=None):
+    # "name" or "name:param:param..." with integer parameters
+    name, *params = spec.split(":")
+    if name not in AGENTS:
+        raise ValueError(f"unknown agent {name!r}, expected one of {', '.join(AGENTS)}")
+    return AGENTS[name](*(int(param) for param in params), seed=seed)
+
+
+class CachedAgent:
+    # Wraps a seeded deterministic agent with a MoveCache shared between
+    # games: a position seen before returns the stored (column, score)
+    # without searching, the same decision a fresh search would make and
+    # drawing nothing from the game's rng either way. Agents meant to play
+    # randomly (random, the MC and MCTS engines) are refused, as caching
+    # would fix their move per position.
+    def __init__(self, agent, cache):
+        if not agent.deterministic:
+            raise ValueError(f"{agent.config} is not deterministic and cannot be cached")
+        if agent.seed is None:
+            raise ValueError("cached agents need a seed")
+        self.agent = agent
+        self.cache = cache
+
+    @property
+    def config(self):
+        return self.agent.config
+
+    @property
+    def seed(self):
+        return self.agent.seed
+
+    def __repr__(self):
+        return repr(self.agent)
+
+    def move(self, board, piece, rng=random, stats=None):
+        decision = self.cache.decision(self.agent.config, self.agent.seed, board, piece)
+        if decision is None:
+            decision = self.agent.move(board, piece, rng, stats)
+            self.cache.store_decision(self.agent.config, self.agent.seed, board, piece, decision)
+        elif stats is not None:
+            stats.tt_hits += 1
+        return decision
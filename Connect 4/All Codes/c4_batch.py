@@ -0,0 +1,260 @@
+import math
+import random
+
+import numpy as np
+
+import c4_board
+from c4_board import (AI_PIECE, CENTER_CELLS, COLUMN_COUNT, COLUMN_HEIGHT, PLAYER_PIECE, ROW_COUNT, WINDOW_CELLS,
+                      drop_piece, get_next_open_row, get_valid_locations, is_terminal_node, score_position, winning_move)
+from c4_bitboard import BOARD_MASK, BOTTOM, TOP, bitboards
+from c4_eval import WINDOW_SCORE
+
+# Vectorized counterparts of the board functions for stacks of boards: an
+# (N, 6, 7) array (or anything reshapeable to (N, 42)) in board layout.
+
+WINDOW_INDEX = np.array(WINDOW_CELLS)
+WINDOW_WEIGHTS = np.array([1, 3, 9, 27])
+CENTER_INDEX = np.array(CENTER_CELLS)
+WINDOW_SCORE_ARRAY = {piece: np.array(table) for piece, table in WINDOW_SCORE.items()}
+
+# Flat cell index -> bit of the position_key() layout
+CELL_BITS = np.array(c4_board.CELL_BITS, dtype=np.uint64)
+
+
+def flat_cells(boards):
+    boards = np.asarray(boards)
+    return boards.reshape(-1, ROW_COUNT * COLUMN_COUNT).astype(np.int64)
+
+
+def unpack_positions(ai_bits, mask):
+    # uint64 arrays of (AI stones, occupancy) bitboards -> (N, 6, 7) boards
+    ai_bits = np.asarray(ai_bits, dtype=np.uint64).reshape(-1, 1)
+    mask = np.asarray(mask, dtype=np.uint64).reshape(-1, 1)
+    occupied = (mask & CELL_BITS) != 0
+    ai = (ai_bits & CELL_BITS) != 0
+    cells = np.where(ai, AI_PIECE, np.where(occupied, PLAYER_PIECE, 0))
+    return cells.reshape(-1, ROW_COUNT, COLUMN_COUNT)
+
+
+def batch_score_position(boards, piece):
+    # score_position() of every board at once: gather the 69 windows of each
+    # board, pack them into base-3 codes and sum the c4_eval lookup table.
+    cells = flat_cells(boards)
+    codes = cells[:, WINDOW_INDEX] @ WINDOW_WEIGHTS
+    scores = WINDOW_SCORE_ARRAY[piece][codes].sum(axis=1)
+    scores += 3 * (cells[:, CENTER_INDEX] == piece).sum(axis=1)
+    return scores
+
+
+def batch_winning_move(boards, piece):
+    cells = flat_cells(boards)
+    return (cells[:, WINDOW_INDEX] == piece).all(axis=2).any(axis=1)
+
+
+def batch_is_full(boards):
+    return (flat_cells(boards) != 0).all(axis=1)
+
+
+def batch_winner(boards):
+    # Per board: AI_PIECE or PLAYER_PIECE if that side has four in a row,
+    # 0 otherwise; plus the full-board flags.
+    cells = flat_cells(boards)
+    windows = cells[:, WINDOW_INDEX]
+    winner = np.zeros(len(cells), dtype=np.int64)
+    winner[(windows == PLAYER_PIECE).all(axis=2).any(axis=1)] = PLAYER_PIECE
+    winner[(windows == AI_PIECE).all(axis=2).any(axis=1)] = AI_PIECE
+    return winner, (cells != 0).all(axis=1)
+
+
+def batch_is_terminal(boards):
+    winner, full = batch_winner(boards)
+    return (winner != 0) | full
+
+
+def packed_alignment(pos):
+    # c4_bitboard.alignment() over a uint64 array of bitboards
+    pos = np.asarray(pos, dtype=np.uint64)
+    found = np.zeros(pos.shape, dtype=bool)
+    for shift in (1, COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1):
+        shift = np.uint64(shift)
+        m = pos & (pos >> shift)
+        found |= (m & (m >> (shift + shift))) != 0
+    return found
+
+
+def packed_winner(ai_bits, mask):
+    # batch_winner() for uint64 arrays of (AI stones, occupancy) bitboards
+    ai_bits = np.asarray(ai_bits, dtype=np.uint64)
+    mask = np.asarray(mask, dtype=np.uint64)
+    winner = np.zeros(ai_bits.shape, dtype=np.int64)
+    winner[packed_alignment(ai_bits ^ mask)] = PLAYER_PIECE
+    winner[packed_alignment(ai_bits)] = AI_PIECE
+    return winner, mask == np.uint64(BOARD_MASK)
+
+
+def score_children(board, valid_locations, maximizingPlayer, cache=None, rng=random, stats=None):
+    # The depth-1 step of minimax(): drop the mover's piece in every valid
+    # column and score all the resulting leaves with one batched call.
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    column = rng.choice(valid_locations)
+    children = np.repeat(board[np.newaxis], len(valid_locations), axis=0)
+    for i, col in enumerate(valid_locations):
+        children[i, get_next_open_row(board, col), col] = piece
+    if cache is None:
+        scores = batch_score_position(children, AI_PIECE).tolist()
+    else:
+        scores = cache.score_many(children, AI_PIECE, stats=stats)
+    wins = batch_winning_move(children, piece).tolist()
+    full = children[:, ROW_COUNT - 1].all(axis=1).tolist()
+    if stats is not None:
+        stats.nodes += len(valid_locations)
+        stats.leaf_evals += len(valid_locations)
+
+    value = -math.inf if maximizingPlayer else math.inf
+    for i, col in enumerate(valid_locations):
+        if wins[i]:
+            new_score = 100000000000000 if piece == AI_PIECE else -10000000000000
+        elif full[i]:  # Board is full
+            new_score = 0
+        else:
+            new_score = scores[i]
+        if (new_score > value) if maximizingPlayer else (new_score < value):
+            value = new_score
+            column = col
+    return column, value
+
+
+def batched_minimax(board, depth, alpha, beta, maximizingPlayer, cache=None, rng=random, stats=None):
+    # minimax() whose depth-1 nodes score their children together
+    if stats is not None:
+        stats.nodes += 1
+    valid_locations = get_valid_locations(board)
+    is_terminal = is_terminal_node(board)
+    if depth == 0 or is_terminal:
+        if is_terminal:
+            if winning_move(board, AI_PIECE):
+                return (None, 100000000000000)
+            elif winning_move(board, PLAYER_PIECE):
+                return (None, -10000000000000)
+            else:  # Game is over, no more valid moves
+                return (None, 0)
+        else:  # Depth is zero
+            if stats is not None:
+                stats.leaf_evals += 1
+            return (None, score_position(board, AI_PIECE) if cache is None else cache.score(board, AI_PIECE, stats))
+    if depth == 1:
+        return score_children(board, valid_locations, maximizingPlayer, cache, rng, stats)
+    if maximizingPlayer:
+        value = -math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, AI_PIECE)
+            new_score = batched_minimax(b_copy, depth - 1, alpha, beta, False, cache, rng, stats)[1]
+            if new_score > value:
+                value = new_score
+                column = col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+    else:  # Minimizing player
+        value = math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, PLAYER_PIECE)
+            new_score = batched_minimax(b_copy, depth - 1, alpha, beta, True, cache, rng, stats)[1]
+            if new_score < value:
+                value = new_score
+                column = col
+            beta = min(beta, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+
+
+BOTTOM_BITS = np.array(BOTTOM, dtype=np.uint64)
+TOP_BITS = np.array(TOP, dtype=np.uint64)
+
+
+def terminal_values(winner, full):
+    # minimax()'s values for finished games, nan where the game goes on
+    values = np.full(winner.shape, np.nan)
+    values[full] = 0
+    values[winner == PLAYER_PIECE] = -10000000000000
+    values[winner == AI_PIECE] = 100000000000000
+    return values
+
+
+def breadth_first_minimax(board, depth, maximizingPlayer=True, cache=None, stats=None):
+    # Fixed-depth minimax without recursion or pruning. Level l holds
+    # 7**l slots of packed positions (child slot = parent slot * 7 + col);
+    # every leaf is scored in one batch_score_position() call and values are
+    # backed up a level at a time with max/min over each group of 7.
+    ai_bits, mask = bitboards(board)
+    ai = np.array([ai_bits], dtype=np.uint64)
+    occupied = np.array([mask], dtype=np.uint64)
+    present = np.array([True])
+    winner, full = packed_winner(ai, occupied)
+    levels = [(present, terminal_values(winner, full))]
+    if not np.isnan(levels[0][1][0]):
+        return None, int(levels[0][1][0])
+    if stats is not None:
+        stats.nodes += 1
+    if depth == 0:
+        if stats is not None:
+            stats.leaf_evals += 1
+        return None, score_position(board, AI_PIECE) if cache is None else cache.score(board, AI_PIECE, stats)
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+
+    for _ in range(depth):
+        present, values = levels[-1]
+        expand = np.repeat(present & np.isnan(values), COLUMN_COUNT)
+        ai = np.repeat(ai, COLUMN_COUNT)
+        occupied = np.repeat(occupied, COLUMN_COUNT)
+        cols = np.tile(np.arange(COLUMN_COUNT), len(present))
+
+        present = expand & ((occupied & TOP_BITS[cols]) == 0)
+        bit = np.where(present, (occupied + BOTTOM_BITS[cols]) & ~occupied, np.uint64(0))
+        occupied = occupied | bit
+        if piece == AI_PIECE:
+            ai = ai | bit
+        winner, full = packed_winner(ai, occupied)
+        levels.append((present, terminal_values(winner, full)))
+        if stats is not None:
+            stats.nodes += int(present.sum())
+        piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+
+    # Heuristic scores for the leaves that are still in play
+    present, values = levels[-1]
+    leaves = present & np.isnan(values)
+    if stats is not None:
+        stats.leaf_evals += int(leaves.sum())
+    if leaves.any():
+        leaf_boards = unpack_positions(ai[leaves], occupied[leaves])
+        if cache is None:
+            values[leaves] = batch_score_position(leaf_boards, AI_PIECE)
+        else:
+            keys = (ai[leaves] + occupied[leaves]).tolist()
+            values[leaves] = cache.score_many(leaf_boards, AI_PIECE, keys, stats)
+
+    for level in range(depth - 1, -1, -1):
+        maximizing = maximizingPlayer == (level % 2 == 0)
+        children_present, children = levels[level + 1]
+        children = np.where(children_present, children, -math.inf if maximizing else math.inf)
+        children = children.reshape(-1, COLUMN_COUNT)
+        present, values = levels[level]
+        open_nodes = present & np.isnan(values)
+        values[open_nodes] = (children.max(axis=1) if maximizing else children.min(axis=1))[open_nodes]
+
+    # `children` is left holding the root's row; argmax/argmin take the
+    # first best column, as minimax() does
+    column = int(children[0].argmax() if maximizingPlayer else children[0].argmin())
+    return column, int(levels[0][1][0])
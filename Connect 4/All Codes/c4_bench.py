@@ -0,0 +1,310 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import timeit
+
+import numpy as np
+
+from c4_batch import (batch_is_terminal, batch_score_position, batch_winner, batch_winning_move, batched_minimax,
+                      breadth_first_minimax, packed_winner)
+from c4_board import (AI_PIECE, COLUMN_COUNT, PLAYER_PIECE, WINDOW_CELLS, bitboards, create_board, drop_piece,
+                      evaluate_window, get_next_open_row, get_valid_locations, h_minimax, is_terminal_node, minimax,
+                      score_position, simulate, winning_move, winning_move_at)
+from c4_eval import IncrementalEvaluator, packed_score_position
+from c4_rollout import FastRollout, fast_simulate
+from c4_search import fast_h_minimax, fast_minimax
+
+# Micro-benchmarks of the board primitives on a fixed set of seeded random
+# positions, compared against a stored baseline:
+#
+#   python c4_bench.py                  # run and compare with the baseline
+#   python c4_bench.py --save-baseline  # run and store the results as the baseline
+#   python c4_bench.py --check          # compare the faster copies with the originals
+#
+# Times are the best of --repeat runs, in ns per call. Baselines are only
+# comparable on the machine (and Python) they were recorded on. --check
+# runs no timings: it fails unless the packed, incremental and batched
+# evaluators and searches return exactly what score_position(),
+# winning_move(), is_terminal_node() and minimax() do.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "c4_bench_baseline.json")
+
+
+def bench_positions(count=50, seed=2024, max_plies=30):
+    # Non-terminal positions after 0 .. max_plies random moves
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = create_board()
+        piece = PLAYER_PIECE
+        for _ in range(rng.randint(0, max_plies)):
+            col = rng.choice(get_valid_locations(board))
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, piece)
+            if winning_move_at(board, row, col, piece):
+                break
+            piece = AI_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+        else:
+            positions.append((board, piece))
+    return positions
+
+
+def benchmarks(positions, seed=2024, minimax_depth=3, minimax_positions=5):
+    # name -> (function over the positions, primitive calls per run)
+    moves = []
+    for board, piece in positions:
+        col = get_valid_locations(board)[0]
+        moves.append((board.copy(), get_next_open_row(board, col), col, piece))
+    # Every 7th window of each position, as the int lists score_position() builds
+    windows = []
+    for board, piece in positions:
+        cells = [int(i) for i in board.ravel().tolist()]
+        windows.extend(([cells[i] for i in window_cells], piece) for window_cells in WINDOW_CELLS[::7])
+    searches = positions[:minimax_positions]
+    rng = random.Random(seed)
+    rollout = FastRollout(rng=random.Random(seed))
+
+    def run_drop_piece():
+        for board, row, col, piece in moves:
+            drop_piece(board, row, col, piece)
+
+    def run_get_next_open_row():
+        for board, _ in positions:
+            for col in range(COLUMN_COUNT):
+                get_next_open_row(board, col)
+
+    def run_get_valid_locations():
+        for board, _ in positions:
+            get_valid_locations(board)
+
+    def run_winning_move():
+        for board, piece in positions:
+            winning_move(board, piece)
+
+    def run_is_terminal_node():
+        for board, _ in positions:
+            is_terminal_node(board)
+
+    def run_evaluate_window():
+        for window, piece in windows:
+            evaluate_window(window, piece)
+
+    def run_score_position():
+        for board, piece in positions:
+            score_position(board, piece)
+
+    def run_packed_score_position():
+        for board, piece in positions:
+            packed_score_position(board, piece)
+
+    def run_simulate():
+        rng.seed(seed)
+        for board, piece in positions:
+            simulate(board, piece, rng)
+
+    def run_fast_simulate():
+        for board, piece in positions:
+            fast_simulate(board, piece, rollout)
+
+    def run_minimax():
+        rng.seed(seed)
+        for board, piece in searches:
+            minimax(board, minimax_depth, -math.inf, math.inf, piece == AI_PIECE, rng=rng)
+
+    def run_fast_minimax():
+        rng.seed(seed)
+        for board, piece in searches:
+            fast_minimax(board, minimax_depth, -math.inf, math.inf, piece == AI_PIECE, rng)
+
+    n = len(positions)
+    return {
+        "drop_piece": (run_drop_piece, n),
+        "get_next_open_row": (run_get_next_open_row, n * COLUMN_COUNT),
+        "get_valid_locations": (run_get_valid_locations, n),
+        "winning_move": (run_winning_move, n),
+        "is_terminal_node": (run_is_terminal_node, n),
+        "evaluate_window": (run_evaluate_window, len(windows)),
+        "score_position": (run_score_position, n),
+        "packed_score_position": (run_packed_score_position, n),
+        "simulate": (run_simulate, n),
+        "fast_simulate": (run_fast_simulate, n),
+        f"minimax_depth{minimax_depth}": (run_minimax, len(searches)),
+        f"fast_minimax_depth{minimax_depth}": (run_fast_minimax, len(searches)),
+    }
+
+
+def run_benchmarks(names=None, repeat=5, positions=50, seed=2024):
+    # name -> best ns per call
+    suite = benchmarks(bench_positions(positions, seed), seed)
+    unknown = [name for name in names or () if name not in suite]
+    if unknown:
+        raise ValueError(f"unknown benchmark {unknown[0]!r}, expected one of {', '.join(suite)}")
+    results = {}
+    for name, (func, calls) in suite.items():
+        if names and name not in names:
+            continue
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        results[name] = min(timer.repeat(repeat, number)) / number / calls * 1e9
+    return results
+
+
+def check_equivalence(positions, depth=3, searches=10):
+    # (name, mismatches, cases) for every faster copy of the c4_board
+    # functions, on the positions and every board one move on from them
+    boards = []
+    for board, piece in positions:
+        boards.append(board)
+        for col in get_valid_locations(board):
+            child = board.copy()
+            drop_piece(child, get_next_open_row(board, col), col, piece)
+            boards.append(child)
+    stack = np.array(boards)
+    results = []
+
+    def compare(name, expected, actual):
+        results.append((name, sum(a != b for a, b in zip(expected, actual)), len(expected)))
+
+    evaluators = [IncrementalEvaluator(board) for board in boards]
+    for piece in (PLAYER_PIECE, AI_PIECE):
+        scores = [score_position(board, piece) for board in boards]
+        compare(f"packed_score_position({piece})", scores, [packed_score_position(board, piece) for board in boards])
+        compare(f"batch_score_position({piece})", scores, batch_score_position(stack, piece).tolist())
+        compare(f"IncrementalEvaluator.score({piece})", scores, [evaluator.score(piece) for evaluator in evaluators])
+        wins = [winning_move(board, piece) for board in boards]
+        compare(f"batch_winning_move({piece})", wins, batch_winning_move(stack, piece).tolist())
+        compare(f"IncrementalEvaluator.winning({piece})", wins, [evaluator.winning(piece) for evaluator in evaluators])
+
+    terminal = [is_terminal_node(board) for board in boards]
+    compare("batch_is_terminal", terminal, batch_is_terminal(stack).tolist())
+    compare("IncrementalEvaluator.is_terminal", terminal, [evaluator.is_terminal() for evaluator in evaluators])
+    winners = [(AI_PIECE if winning_move(board, AI_PIECE) else PLAYER_PIECE if winning_move(board, PLAYER_PIECE) else 0,
+                not get_valid_locations(board)) for board in boards]
+    winner, full = batch_winner(stack)
+    compare("batch_winner", winners, zip(winner.tolist(), full.tolist()))
+    ai_bits, mask = (np.array(bits, dtype=np.uint64) for bits in zip(*(bitboards(board) for board in boards)))
+    winner, full = packed_winner(ai_bits, mask)
+    compare("packed_winner", winners, zip(winner.tolist(), full.tolist()))
+
+    # play() and undo() against scoring the boards from scratch
+    expected = []
+    actual = []
+    for board, piece in positions:
+        evaluator = IncrementalEvaluator(board)
+        for col in get_valid_locations(board):
+            child = board.copy()
+            drop_piece(child, get_next_open_row(board, col), col, piece)
+            for after, played in ((child, True), (board, False)):
+                if played:
+                    evaluator.play(col, piece)
+                else:
+                    evaluator.undo(col)
+                expected.append((score_position(after, PLAYER_PIECE), score_position(after, AI_PIECE)))
+                actual.append((evaluator.score(PLAYER_PIECE), evaluator.score(AI_PIECE)))
+    compare("IncrementalEvaluator.play/undo", expected, actual)
+
+    # The searches return the same (column, value); minimax() only draws
+    # a provisional column that every search replaces
+    found = {name: [] for name in ("minimax", "h_minimax", "fast_minimax", "fast_h_minimax", "batched_minimax",
+                                   "breadth_first_minimax")}
+    for board, piece in positions[:searches]:
+        maximizing = piece == AI_PIECE
+        found["minimax"].append(minimax(board, depth, -math.inf, math.inf, maximizing))
+        # h_minimax() stops depth_limit plies early
+        found["h_minimax"].append(h_minimax(board, depth + 2, -math.inf, math.inf, maximizing, 2))
+        found["fast_minimax"].append(fast_minimax(board, depth, -math.inf, math.inf, maximizing))
+        found["fast_h_minimax"].append(fast_h_minimax(board, depth + 2, -math.inf, math.inf, maximizing, 2))
+        found["batched_minimax"].append(batched_minimax(board, depth, -math.inf, math.inf, maximizing))
+        found["breadth_first_minimax"].append(breadth_first_minimax(board, depth, maximizing))
+    for name in ("h_minimax", "fast_minimax", "batched_minimax", "breadth_first_minimax"):
+        compare(name, found["minimax"], found[name])
+    compare("fast_h_minimax", found["h_minimax"], found["fast_h_minimax"])
+    return results
+
+
+def print_checks(results):
+    # Returns whether everything matched
+    print(f"{'Check':<40} {'mismatches':>10} {'cases':>7}")
+    for name, mismatches, cases in results:
+        print(f"{name:<40} {mismatches:10d} {cases:7d}{'  MISMATCH' if mismatches else ''}")
+    return not any(mismatches for _, mismatches, _ in results)
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, positions, seed):
+    data = {"python": sys.version.split()[0], "positions": positions, "seed": seed, "ns_per_call": results}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def print_results(results, baseline=None, threshold=0.1):
+    # Returns the names that got slower than the baseline by more than threshold
+    reference = baseline["ns_per_call"] if baseline is not None else {}
+    regressions = []
+    print(f"{'Benchmark':<28} {'ns/call':>14} {'baseline':>14} {'change':>9}")
+    for name, ns in results.items():
+        if name in reference:
+            change = ns / reference[name] - 1.0
+            flag = ""
+            if change > threshold:
+                flag = "  slower"
+                regressions.append(name)
+            elif change < -threshold:
+                flag = "  faster"
+            print(f"{name:<28} {ns:14.1f} {reference[name]:14.1f} {change:+9.1%}{flag}")
+        else:
+            print(f"{name:<28} {ns:14.1f} {'-':>14} {'-':>9}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the Connect 4 board primitives.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per benchmark, the best is kept")
+    parser.add_argument("--positions", type=int, default=50, help="number of seeded positions")
+    parser.add_argument("--seed", type=int, default=2024, help="seed of the positions and rollouts")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression (exit status 1)")
+    parser.add_argument("--check", action="store_true",
+                        help="instead of timing, check that the faster copies match the originals exactly")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        if not print_checks(check_equivalence(bench_positions(args.positions, args.seed))):
+            sys.exit(1)
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None and (baseline["positions"], baseline["seed"]) != (args.positions, args.seed):
+        print("Baseline was recorded on other positions, not comparing")
+        baseline = None
+    try:
+        results = run_benchmarks(args.names, args.repeat, args.positions, args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+    regressions = print_results(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        if baseline is not None and args.names:
+            # Keep the entries of benchmarks that were not run
+            results = dict(baseline["ns_per_call"], **results)
+        save_baseline(args.baseline, results, args.positions, args.seed)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+from c4_board import AI_PIECE, COLUMN_COUNT, COLUMN_HEIGHT, PLAYER_PIECE, ROW_COUNT, bitboards, create_board
+
+# Compact board as two ints in the position_key() layout: `mask` has a bit
+# for every occupied cell and `ai_bits` the subset holding AI stones.
+# bitboards() converts a board; it lives in c4_board next to position_key().
+
+BOTTOM = [1 << (col * COLUMN_HEIGHT) for col in range(COLUMN_COUNT)]
+TOP = [1 << (col * COLUMN_HEIGHT + ROW_COUNT - 1) for col in range(COLUMN_COUNT)]
+FULL_COLUMNS = (1 << COLUMN_COUNT) - 1
+BOTTOM_ROW = sum(BOTTOM)
+BOARD_MASK = BOTTOM_ROW * ((1 << ROW_COUNT) - 1)
+
+
+def to_board(ai_bits, mask):
+    board = create_board()
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT):
+            bit = 1 << (c * COLUMN_HEIGHT + r)
+            if mask & bit:
+                board[r][c] = AI_PIECE if ai_bits & bit else PLAYER_PIECE
+    return board
+
+
+def legal_columns(mask):
+    legal = 0
+    for col in range(COLUMN_COUNT):
+        if not mask & TOP[col]:
+            legal |= 1 << col
+    return legal
+
+
+def drop_bit(mask, col):
+    # The lowest empty cell of the column: adding the column's bottom bit
+    # carries through the occupied cells.
+    return (mask + BOTTOM[col]) & ~mask
+
+
+def alignment(pos):
+    # Shifts 1, 7, 6 and 8 are vertical, horizontal and the two diagonals; the
+    # empty sentinel row keeps lines from wrapping between columns.
+    for shift in (1, COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1):
+        m = pos & (pos >> shift)
+        if m & (m >> (2 * shift)):
+            return True
+    return False
+
+
+def playable_cells(mask):
+    return (mask + BOTTOM_ROW) & BOARD_MASK
+
+
+def winning_cells(pos, mask):
+    # Empty cells that would complete a line of `pos`, playable or not
+    cells = (pos << 1) & (pos << 2) & (pos << 3)
+    for shift in (COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1):
+        pair = (pos << shift) & (pos << (2 * shift))
+        cells |= pair & (pos << (3 * shift))
+        cells |= pair & (pos >> shift)
+        pair = (pos >> shift) & (pos >> (2 * shift))
+        cells |= pair & (pos << shift)
+        cells |= pair & (pos >> (3 * shift))
+    return cells & (BOARD_MASK ^ mask)
+
+
+def forced_result(me, opp, mask, depth):
+    # Win/loss-only negamax for the side owning `me`, to move: 1 if it wins
+    # within `depth` plies whatever the reply, -1 if it loses, 0 otherwise.
+    playable = playable_cells(mask)
+    if winning_cells(me, mask) & playable:
+        return 1
+    if depth <= 1 or not playable:
+        return 0
+    threats = winning_cells(opp, mask) & playable
+    if threats & (threats - 1):
+        return -1
+    moves = threats if threats else playable
+
+    best = -1
+    while moves:
+        bit = moves & -moves
+        moves ^= bit
+        result = -forced_result(opp, me | bit, mask | bit, depth - 1)
+        if result > best:
+            best = result
+            if best == 1:
+                break
+    return best
+
+
+def column_of(bit):
+    return (bit.bit_length() - 1) // COLUMN_HEIGHT
+
+
+def pieces(ai_bits, mask, piece):
+    return ai_bits if piece == AI_PIECE else ai_bits ^ mask
@@ -0,0 +1,394 @@
+import numpy as np
+import random
+import math
+
+# Shared board primitives and engines, copied from the match scripts so that
+# new code can import them instead of pasting another copy.
+
+ROW_COUNT = 6
+COLUMN_COUNT = 7
+
+PLAYER = 0
+AI = 1
+
+EMPTY = 0
+PLAYER_PIECE = 1
+AI_PIECE = 2
+
+WINDOW_LENGTH = 4
+
+# Bitboard layout used by position keys: column c owns bits c*7 .. c*7+6,
+# row r of that column is bit c*7+r and bit c*7+6 is a spare sentinel.
+COLUMN_HEIGHT = ROW_COUNT + 1
+
+# The 69 four-cell windows, computed once, as flat cell indexes
+# (r * COLUMN_COUNT + c, the order of board.ravel()) in the order
+# score_position() has always visited them.
+WINDOW_CELLS = []
+for _r in range(ROW_COUNT):
+    for _c in range(COLUMN_COUNT - 3):
+        WINDOW_CELLS.append(tuple(_r * COLUMN_COUNT + _c + i for i in range(WINDOW_LENGTH)))
+for _c in range(COLUMN_COUNT):
+    for _r in range(ROW_COUNT - 3):
+        WINDOW_CELLS.append(tuple((_r + i) * COLUMN_COUNT + _c for i in range(WINDOW_LENGTH)))
+for _r in range(ROW_COUNT - 3):
+    for _c in range(COLUMN_COUNT - 3):
+        WINDOW_CELLS.append(tuple((_r + i) * COLUMN_COUNT + _c + i for i in range(WINDOW_LENGTH)))
+for _r in range(ROW_COUNT - 3):
+    for _c in range(COLUMN_COUNT - 3):
+        WINDOW_CELLS.append(tuple((_r + 3 - i) * COLUMN_COUNT + _c + i for i in range(WINDOW_LENGTH)))
+
+
+def cell_bit(cell):
+    row, col = divmod(cell, COLUMN_COUNT)
+    return 1 << (col * COLUMN_HEIGHT + row)
+
+
+CELL_BITS = [cell_bit(cell) for cell in range(ROW_COUNT * COLUMN_COUNT)]
+
+# (window, position in window) for every window through each flat cell
+CELL_WINDOWS = [[] for _ in range(ROW_COUNT * COLUMN_COUNT)]
+for _w, _cells in enumerate(WINDOW_CELLS):
+    for _i, _cell in enumerate(_cells):
+        CELL_WINDOWS[_cell].append((_w, _i))
+
+CENTER_CELLS = tuple(r * COLUMN_COUNT + COLUMN_COUNT // 2 for r in range(ROW_COUNT))
+
+
+def create_board():
+    board = np.zeros((ROW_COUNT, COLUMN_COUNT))
+    return board
+
+
+def drop_piece(board, row, col, piece):
+    board[row][col] = piece
+
+
+def is_valid_location(board, col):
+    return board[ROW_COUNT - 1][col] == 0
+
+
+def get_next_open_row(board, col):
+    for r in range(ROW_COUNT):
+        if board[r][col] == 0:
+            return r
+
+
+def print_board(board):
+    print(np.flip(board, 0))
+
+
+def winning_move(board, piece):
+    cells = board.ravel().tolist()
+    for a, b, c, d in WINDOW_CELLS:
+        if cells[a] == piece and cells[b] == piece and cells[c] == piece and cells[d] == piece:
+            return True
+    return False
+
+
+def winning_move_at(board, row, col, piece):
+    # Only the windows through (row, col) can have been completed by a piece
+    # just dropped there.
+    cells = board.ravel().tolist()
+    for w, _ in CELL_WINDOWS[row * COLUMN_COUNT + col]:
+        a, b, c, d = WINDOW_CELLS[w]
+        if cells[a] == piece and cells[b] == piece and cells[c] == piece and cells[d] == piece:
+            return True
+    return False
+
+
+def evaluate_window(window, piece):
+    score = 0
+    opp_piece = PLAYER_PIECE
+    if piece == PLAYER_PIECE:
+        opp_piece = AI_PIECE
+
+    if window.count(piece) == 4:
+        score += 100
+    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
+        score += 5
+    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
+        score += 2
+
+    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
+        score -= 4
+
+    return score
+
+
+def score_position(board, piece):
+    cells = [int(i) for i in board.ravel().tolist()]
+    score = 0
+
+    ## Score center column
+    center_array = [cells[i] for i in CENTER_CELLS]
+    center_count = center_array.count(piece)
+    score += center_count * 3
+
+    ## Score horizontal, vertical and both diagonals
+    for window_cells in WINDOW_CELLS:
+        window = [cells[i] for i in window_cells]
+        score += evaluate_window(window, piece)
+
+    return score
+
+
+def is_terminal_node(board):
+    return winning_move(board, PLAYER_PIECE) or winning_move(board, AI_PIECE) or len(get_valid_locations(board)) == 0
+
+
+def get_valid_locations(board):
+    valid_locations = []
+    for col in range(COLUMN_COUNT):
+        if is_valid_location(board, col):
+            valid_locations.append(col)
+    return valid_locations
+
+
+def bitboards(board):
+    # (ai_bits, mask) in the layout above: `mask` has a bit for every
+    # occupied cell and `ai_bits` the subset holding AI stones
+    mask = 0
+    ai_bits = 0
+    for cell, value in enumerate(board.ravel().tolist()):
+        if value != EMPTY:
+            mask |= CELL_BITS[cell]
+            if value == AI_PIECE:
+                ai_bits |= CELL_BITS[cell]
+    return ai_bits, mask
+
+
+def position_key(board):
+    # Unique integer per board: AI stones plus the occupancy mask, one 7-bit
+    # group per column (the mask's carry lands in the unused top bit).
+    ai_bits, mask = bitboards(board)
+    return ai_bits + mask
+
+
+def random_move(board, rng=random):
+    valid_locations = get_valid_locations(board)
+    return rng.choice(valid_locations) if valid_locations else None
+
+
+def pick_best_move(board, piece, rng=random, stats=None):
+    valid_locations = get_valid_locations(board)
+    if stats is not None:
+        stats.nodes += 1
+        stats.leaf_evals += len(valid_locations)
+    best_score = -10000
+    best_col = rng.choice(valid_locations)
+    for col in valid_locations:
+        row = get_next_open_row(board, col)
+        temp_board = board.copy()
+        drop_piece(temp_board, row, col, piece)
+        score = score_position(temp_board, piece)
+        if score > best_score:
+            best_score = score
+            best_col = col
+
+    return best_col
+
+
+def minimax(board, depth, alpha, beta, maximizingPlayer, cache=None, rng=random, stats=None):
+    if stats is not None:
+        stats.nodes += 1
+    valid_locations = get_valid_locations(board)
+    is_terminal = is_terminal_node(board)
+    if depth == 0 or is_terminal:
+        if is_terminal:
+            if winning_move(board, AI_PIECE):
+                return (None, 100000000000000)
+            elif winning_move(board, PLAYER_PIECE):
+                return (None, -10000000000000)
+            else:  # Game is over, no more valid moves
+                return (None, 0)
+        else:  # Depth is zero
+            if stats is not None:
+                stats.leaf_evals += 1
+            return (None, score_position(board, AI_PIECE) if cache is None else cache.score(board, AI_PIECE, stats))
+    if maximizingPlayer:
+        value = -math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, AI_PIECE)
+            new_score = minimax(b_copy, depth - 1, alpha, beta, False, cache, rng, stats)[1]
+            if new_score > value:
+                value = new_score
+                column = col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+    else:  # Minimizing player
+        value = math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, PLAYER_PIECE)
+            new_score = minimax(b_copy, depth - 1, alpha, beta, True, cache, rng, stats)[1]
+            if new_score < value:
+                value = new_score
+                column = col
+            beta = min(beta, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+
+
+def h_minimax(board, depth, alpha, beta, maximizingPlayer, depth_limit=6, cache=None, rng=random, stats=None):
+    if stats is not None:
+        stats.nodes += 1
+    valid_locations = get_valid_locations(board)
+    is_terminal = is_terminal_node(board)
+    if depth == 0 or is_terminal or depth == depth_limit:  # Depth limit added
+        if is_terminal:
+            if winning_move(board, AI_PIECE):
+                return (None, 100000000000000)
+            elif winning_move(board, PLAYER_PIECE):
+                return (None, -10000000000000)
+            else:
+                return (None, 0)
+        else:
+            if stats is not None:
+                stats.leaf_evals += 1
+            return (None, score_position(board, AI_PIECE) if cache is None else cache.score(board, AI_PIECE, stats))
+    if maximizingPlayer:
+        value = -math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, AI_PIECE)
+            new_score = h_minimax(b_copy, depth - 1, alpha, beta, False, depth_limit, cache, rng, stats)[1]
+            if new_score > value:
+                value = new_score
+                column = col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+    else:
+        value = math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            b_copy = board.copy()
+            drop_piece(b_copy, row, col, PLAYER_PIECE)
+            new_score = h_minimax(b_copy, depth - 1, alpha, beta, True, depth_limit, cache, rng, stats)[1]
+            if new_score < value:
+                value = new_score
+                column = col
+            beta = min(beta, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+
+
+# MCTS Functions
+def simulate(board, piece, rng=random, stats=None):
+    temp_board = board.copy()
+    turn = piece
+    plies = 0
+    while not is_terminal_node(temp_board):
+        valid_locations = get_valid_locations(temp_board)
+        if len(valid_locations) == 0:
+            break
+        col = rng.choice(valid_locations)
+        row = get_next_open_row(temp_board, col)
+        drop_piece(temp_board, row, col, turn)
+        turn = PLAYER_PIECE if turn == AI_PIECE else AI_PIECE
+        plies += 1
+    if stats is not None:
+        stats.rollouts += 1
+        stats.rollout_plies += plies
+    return 1 if winning_move(temp_board, piece) else -1 if winning_move(temp_board, turn) else 0
+
+
+def mcts_move(board, piece, n_simulations=100, rng=random, stats=None):
+    valid_locations = get_valid_locations(board)
+    best_score = -float('inf')
+    best_col = rng.choice(valid_locations)
+    for col in valid_locations:
+        score = 0
+        for _ in range(n_simulations):
+            row = get_next_open_row(board, col)
+            temp_board = board.copy()
+            drop_piece(temp_board, row, col, piece)
+            score += simulate(temp_board, piece, rng, stats)
+        if score > best_score:
+            best_score = score
+            best_col = col
+    return best_col
+
+
+class MonteCarloTreeSearch:
+    def __init__(self, board, ai_piece, rng=random, stats=None):
+        self.board = board
+        self.ai_piece = ai_piece
+        self.player_piece = 3 - ai_piece
+        self.rng = rng
+        self.stats = stats
+
+    def get_best_move(self):
+        valid_locations = get_valid_locations(self.board)
+        if not valid_locations:
+            return None
+
+        best_move = None
+        best_score = -math.inf
+
+        for col in valid_locations:
+            row = get_next_open_row(self.board, col)
+            temp_board = self.board.copy()
+            drop_piece(temp_board, row, col, self.ai_piece)
+            score = self.monte_carlo_simulation(temp_board, self.ai_piece, self.player_piece)
+
+            if score > best_score:
+                best_score = score
+                best_move = col
+
+        return best_move
+
+    def monte_carlo_simulation(self, board, ai_piece, player_piece):
+        sim_count = 1000
+        wins = 0
+
+        if self.stats is not None:
+            self.stats.rollouts += sim_count
+        for _ in range(sim_count):
+            sim_board = board.copy()
+            current_piece = ai_piece
+            is_game_over = False
+
+            while not is_game_over:
+                valid_moves = get_valid_locations(sim_board)
+                if not valid_moves:
+                    break
+
+                col = self.rng.choice(valid_moves)
+
+                row = get_next_open_row(sim_board, col)
+                drop_piece(sim_board, row, col, current_piece)
+                if self.stats is not None:
+                    self.stats.rollout_plies += 1
+
+                if winning_move(sim_board, current_piece):
+                    if current_piece == ai_piece:
+                        wins += 1
+                    break
+
+                current_piece = player_piece if current_piece == ai_piece else ai_piece
+                is_game_over = len(get_valid_locations(sim_board)) == 0
+
+        return wins
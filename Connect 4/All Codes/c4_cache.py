@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+from c4_batch import batch_score_position
+from c4_board import position_key, score_position
+
+
+class LRUCache:
+    # A dict kept in least-recently-used order and capped at max_entries,
+    # with hit/miss/eviction counters.
+    def __init__(self, max_entries=1 << 18):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        score = self.entries.get(key)
+        if score is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return score
+
+    def store(self, key, score):
+        self.entries[key] = score
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"entries": len(self.entries), "max_entries": self.max_entries, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hit_rate()}
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class EvalCache(LRUCache):
+    # score_position() results keyed by (position_key, piece). Pass one
+    # instance as `cache=` to minimax(), h_minimax(), batched_minimax() or
+    # breadth_first_minimax() and keep it between moves so the next search
+    # reuses the leaves. Hits are counted as tt_hits in `stats` if given.
+    def score(self, board, piece, stats=None):
+        key = (position_key(board), piece)
+        score = self.lookup(key)
+        if score is None:
+            score = score_position(board, piece)
+            self.store(key, score)
+        elif stats is not None:
+            stats.tt_hits += 1
+        return score
+
+    def score_many(self, boards, piece, keys=None, stats=None):
+        # Cached scores for a stack of boards; the misses are scored together
+        # with batch_score_position(). `keys` may hold precomputed position keys.
+        if keys is None:
+            keys = [position_key(board) for board in boards]
+        scores = [self.lookup((key, piece)) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if stats is not None:
+            stats.tt_hits += len(scores) - len(missing)
+        if missing:
+            for i, score in zip(missing, batch_score_position(boards[missing], piece).tolist()):
+                scores[i] = score
+                self.store((keys[i], piece), score)
+        return scores
+
+
+class MoveCache(LRUCache):
+    # Decisions of deterministic agents keyed by (agent config, seed,
+    # position_key, piece) -> (column, score), shared across the games of a
+    # match. Only valid for agents whose move is a function of those keys,
+    # see c4_agents.CachedAgent.
+    def decision(self, config, seed, board, piece):
+        return self.lookup((config, seed, position_key(board), piece))
+
+    def store_decision(self, config, seed, board, piece, decision):
+        self.store((config, seed, position_key(board), piece), decision)
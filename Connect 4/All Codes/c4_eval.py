@@ -0,0 +1,133 @@
+import numpy as np
+
+from c4_board import (AI_PIECE, CELL_WINDOWS, CENTER_CELLS, COLUMN_COUNT, PLAYER_PIECE, ROW_COUNT, WINDOW_CELLS,
+                      WINDOW_LENGTH, evaluate_window)
+
+# score_position() with every 4-cell window packed into a base-3 code
+# (cell0 + 3*cell1 + 9*cell2 + 27*cell3) and scored by table lookup.
+
+WINDOW_STATES = 3 ** WINDOW_LENGTH
+
+
+def decode_window(code):
+    return [code // 3 ** i % 3 for i in range(WINDOW_LENGTH)]
+
+
+WINDOW_SCORE = {piece: [evaluate_window(decode_window(code), piece) for code in range(WINDOW_STATES)]
+                for piece in (PLAYER_PIECE, AI_PIECE)}
+
+
+def board_cells(board):
+    return board.ravel().astype(np.int64).tolist()
+
+
+def packed_score_position(board, piece):
+    # Same value as score_position(board, piece)
+    cells = board_cells(board)
+    table = WINDOW_SCORE[piece]
+
+    score = 0
+    for i in CENTER_CELLS:
+        if cells[i] == piece:
+            score += 3
+
+    for a, b, c, d in WINDOW_CELLS:
+        score += table[cells[a] + 3 * cells[b] + 9 * cells[c] + 27 * cells[d]]
+    return score
+
+
+# (window, base-3 weight) pairs through each cell
+CELL_WEIGHTS = [[(w, 3 ** i) for w, i in windows] for windows in CELL_WINDOWS]
+
+# Code of a window holding four of the same piece
+FOUR_CODE = {piece: piece * (WINDOW_STATES - 1) // 2 for piece in (PLAYER_PIECE, AI_PIECE)}
+
+
+class IncrementalEvaluator:
+    # Keeps every window's base-3 code and both pieces' running
+    # score_position() totals, so play() and undo() only touch the (at most
+    # 16) windows through the dropped cell and score() is a lookup.
+    def __init__(self, board):
+        self.cells = [0] * (ROW_COUNT * COLUMN_COUNT)
+        self.heights = [0] * COLUMN_COUNT
+        self.codes = [0] * len(WINDOW_CELLS)
+        self.scores = {piece: len(WINDOW_CELLS) * WINDOW_SCORE[piece][0] for piece in (PLAYER_PIECE, AI_PIECE)}
+        self.fours = {PLAYER_PIECE: 0, AI_PIECE: 0}
+        self.moves = 0
+
+        cells = board_cells(board)
+        for r in range(ROW_COUNT):
+            for c in range(COLUMN_COUNT):
+                if cells[r * COLUMN_COUNT + c]:
+                    self.place(r, c, cells[r * COLUMN_COUNT + c])
+
+    def place(self, row, col, piece):
+        cell = row * COLUMN_COUNT + col
+        self.cells[cell] = piece
+        self.heights[col] = row + 1
+        self.moves += 1
+        codes = self.codes
+        player_table = WINDOW_SCORE[PLAYER_PIECE]
+        ai_table = WINDOW_SCORE[AI_PIECE]
+        four = FOUR_CODE[piece]
+        player_score = self.scores[PLAYER_PIECE]
+        ai_score = self.scores[AI_PIECE]
+        for w, weight in CELL_WEIGHTS[cell]:
+            old = codes[w]
+            new = old + piece * weight
+            codes[w] = new
+            player_score += player_table[new] - player_table[old]
+            ai_score += ai_table[new] - ai_table[old]
+            if new == four:
+                self.fours[piece] += 1
+        if col == COLUMN_COUNT // 2:
+            if piece == PLAYER_PIECE:
+                player_score += 3
+            else:
+                ai_score += 3
+        self.scores[PLAYER_PIECE] = player_score
+        self.scores[AI_PIECE] = ai_score
+
+    def play(self, col, piece):
+        self.place(self.heights[col], col, piece)
+
+    def undo(self, col):
+        row = self.heights[col] - 1
+        cell = row * COLUMN_COUNT + col
+        piece = self.cells[cell]
+        self.cells[cell] = 0
+        self.heights[col] = row
+        self.moves -= 1
+        codes = self.codes
+        player_table = WINDOW_SCORE[PLAYER_PIECE]
+        ai_table = WINDOW_SCORE[AI_PIECE]
+        four = FOUR_CODE[piece]
+        player_score = self.scores[PLAYER_PIECE]
+        ai_score = self.scores[AI_PIECE]
+        for w, weight in CELL_WEIGHTS[cell]:
+            old = codes[w]
+            new = old - piece * weight
+            codes[w] = new
+            player_score += player_table[new] - player_table[old]
+            ai_score += ai_table[new] - ai_table[old]
+            if old == four:
+                self.fours[piece] -= 1
+        if col == COLUMN_COUNT // 2:
+            if piece == PLAYER_PIECE:
+                player_score -= 3
+            else:
+                ai_score -= 3
+        self.scores[PLAYER_PIECE] = player_score
+        self.scores[AI_PIECE] = ai_score
+
+    def score(self, piece):
+        return self.scores[piece]
+
+    def winning(self, piece):
+        return self.fours[piece] > 0
+
+    def valid_locations(self):
+        return [col for col in range(COLUMN_COUNT) if self.heights[col] < ROW_COUNT]
+
+    def is_terminal(self):
+        return self.fours[PLAYER_PIECE] > 0 or self.fours[AI_PIECE] > 0 or self.moves == ROW_COUNT * COLUMN_COUNT
@@ -0,0 +1,125 @@
+import bisect
+import json
+
+# Move latencies in fixed-bucket histograms, per agent and game phase. The
+# buckets are shared by every histogram (four per doubling from 1 us to
+# about 2 minutes), so histograms from different workers or runs merge by
+# adding counts and percentiles are read off the bucket bounds, within 19%.
+
+BUCKETS_PER_DOUBLING = 4
+BUCKET_BOUNDS_NS = [int(1000 * 2 ** (i / BUCKETS_PER_DOUBLING)) for i in range(27 * BUCKETS_PER_DOUBLING + 1)]
+
+# Phases by ply, counted from the empty board including any opening
+PHASES = (("opening", 0, 10), ("middlegame", 10, 25), ("endgame", 25, 42))
+
+
+def bucket_of(ns):
+    # Index of the first bound >= ns; the last bucket also takes anything slower
+    return min(bisect.bisect_left(BUCKET_BOUNDS_NS, ns), len(BUCKET_BOUNDS_NS) - 1)
+
+
+def phase_of(ply):
+    for name, start, end in PHASES:
+        if start <= ply < end:
+            return name
+    return PHASES[-1][0]
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKET_BOUNDS_NS)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        self.counts[bucket_of(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th percentile, capped at the
+        # slowest move seen
+        if not self.count:
+            return 0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(BUCKET_BOUNDS_NS[i], self.max_ns)
+        return self.max_ns
+
+    def to_dict(self):
+        # Sparse counts keyed by bucket bound in ns
+        return {"count": self.count, "total_ns": self.total_ns, "max_ns": self.max_ns,
+                "p50_ns": self.percentile(50), "p90_ns": self.percentile(90), "p99_ns": self.percentile(99),
+                "buckets": {str(BUCKET_BOUNDS_NS[i]): count for i, count in enumerate(self.counts) if count}}
+
+
+class LatencyTracker:
+    # LatencyHistogram per (agent, phase), filled from game results
+    def __init__(self):
+        self.histograms = {}
+
+    def histogram(self, agent, phase):
+        key = (agent, phase)
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram()
+        return self.histograms[key]
+
+    def record(self, agent, ply, ns):
+        self.histogram(agent, phase_of(ply)).record(ns)
+
+    def add_game(self, result):
+        # move_ns[k] is the time of ply len(opening) + k; the starter moves on
+        # even plies
+        first_ply = len(result["opening"])
+        for k, ns in enumerate(result["move_ns"]):
+            ply = first_ply + k
+            side = result["starter"] if ply % 2 == 0 else 1 - result["starter"]
+            self.record(result["agents"][side], ply, ns)
+
+    def agents(self):
+        return list(dict.fromkeys(agent for agent, _ in self.histograms))
+
+    def overall(self, agent):
+        total = LatencyHistogram()
+        for (name, _), histogram in self.histograms.items():
+            if name == agent:
+                total.merge(histogram)
+        return total
+
+    def to_dict(self):
+        agents = {}
+        for agent in self.agents():
+            phases = {phase: self.histograms[(agent, phase)].to_dict() for phase, _, _ in PHASES
+                      if (agent, phase) in self.histograms}
+            phases["all"] = self.overall(agent).to_dict()
+            agents[agent] = phases
+        return {"bucket_bounds_ns": BUCKET_BOUNDS_NS, "phases": [list(phase) for phase in PHASES], "agents": agents}
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+
+def print_latencies(tracker):
+    print(f"{'Agent':<24} {'Phase':<11} {'Moves':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for agent in tracker.agents():
+        rows = [(phase, tracker.histograms[(agent, phase)]) for phase, _, _ in PHASES
+                if (agent, phase) in tracker.histograms]
+        rows.append(("all", tracker.overall(agent)))
+        for phase, histogram in rows:
+            print(f"{agent:<24} {phase:<11} {histogram.count:6d} {histogram.percentile(50) / 1e6:9.3f} "
+                  f"{histogram.percentile(90) / 1e6:9.3f} {histogram.percentile(99) / 1e6:9.3f} "
+                  f"{histogram.max_ns / 1e6:9.3f}")
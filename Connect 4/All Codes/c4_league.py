@@ -0,0 +1,181 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+
+import numpy as np
+
+from c4_agents import make_agent
+from c4_openings import opening_count
+from c4_tournament import add_result, new_summary, run_pairings
+
+# Round-robin league over any number of agent specs, kept in a JSON file:
+#
+#   python c4_league.py league.json --add random --add minimax:3 --add mcts:100 --games 20 --workers 8
+#
+# Each pairing is played up to --games games; pairings that already have
+# them are not replayed, so adding an agent later only plays its new
+# pairings. Bradley-Terry ratings (on the Elo scale) and their confidence
+# intervals are refitted after every finished game.
+
+ELO_SCALE = 400.0 / math.log(10.0)
+
+
+class League:
+    def __init__(self, path, seed=None, opening_plies=0):
+        # seed and opening_plies only apply to a new league file
+        self.path = path
+        self.agents = []
+        self.results = {}
+        self.strengths = {}
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.opening_plies = opening_plies
+        if os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        self.seed = data["seed"]
+        self.opening_plies = data["opening_plies"]
+        self.agents = data["agents"]
+        self.results = {tuple(summary["agents"]): summary for summary in data["results"]}
+        self.strengths = data.get("strengths", {})
+
+    def save(self):
+        data = {"seed": self.seed, "opening_plies": self.opening_plies, "agents": self.agents,
+                "results": list(self.results.values()), "strengths": self.strengths}
+        # Write then rename, so an interrupted save keeps the previous file
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(self.path + ".tmp", self.path)
+
+    def add_agent(self, spec):
+        make_agent(spec)  # raises ValueError for a bad spec
+        if spec not in self.agents:
+            self.agents.append(spec)
+
+    def pairings(self):
+        return list(itertools.combinations(self.agents, 2))
+
+    def summary(self, pairing):
+        if pairing not in self.results:
+            self.results[pairing] = new_summary(*pairing)
+        return self.results[pairing]
+
+    def play(self, n_games, workers=1, cache_size=0, on_result=None, log=None):
+        # Brings every pairing up to n_games games, logging them to `log`
+        pairings = [pairing for pairing in self.pairings() if self.summary(pairing)["games"] < n_games]
+        played = [self.summary(pairing)["games"] for pairing in pairings]
+
+        def record(result, _):
+            add_result(self.summary(pairings[result["pairing"]]), result)
+            self.fit()
+            self.save()
+            if on_result is not None:
+                on_result(result, self)
+
+        run_pairings(pairings, n_games, workers, cache_size, self.seed, None, self.opening_plies, record, played, log)
+        self.fit()
+        self.save()
+
+    def scores(self):
+        # wins[i][j]: points of agent i against agent j (draws count half)
+        # games[i][j]: games between them
+        index = {spec: i for i, spec in enumerate(self.agents)}
+        n = len(self.agents)
+        wins = np.zeros((n, n))
+        games = np.zeros((n, n))
+        for (a, b), summary in self.results.items():
+            if a not in index or b not in index:
+                continue
+            i, j = index[a], index[b]
+            wins[i, j] += summary["wins"][0] + 0.5 * summary["draws"]
+            wins[j, i] += summary["wins"][1] + 0.5 * summary["draws"]
+            games[i, j] += summary["games"]
+            games[j, i] += summary["games"]
+        return wins, games
+
+    def fit(self, iterations=1000, tolerance=1e-9):
+        # Bradley-Terry strengths by Hunter's MM iteration, warm-started from
+        # the previous fit. Every played pairing gets one extra virtual draw,
+        # which keeps strengths finite for agents that won or lost every game.
+        wins, games = self.scores()
+        played = games > 0
+        wins = wins + 0.5 * played
+        games = games + played
+        total_wins = wins.sum(axis=1)
+        gamma = np.array([math.exp(self.strengths.get(spec, 0.0)) for spec in self.agents])
+        for _ in range(iterations):
+            denominator = (games / (gamma[:, np.newaxis] + gamma[np.newaxis, :])).sum(axis=1)
+            new_gamma = np.where(denominator > 0, total_wins / np.where(denominator > 0, denominator, 1), gamma)
+            new_gamma /= math.exp(np.log(new_gamma).mean())
+            converged = np.abs(np.log(new_gamma) - np.log(gamma)).max() < tolerance
+            gamma = new_gamma
+            if converged:
+                break
+        self.strengths = {spec: float(math.log(g)) for spec, g in zip(self.agents, gamma)}
+        return self.strengths
+
+    def ratings(self, z=1.96):
+        # (spec, elo, half-width of the z confidence interval, games, score)
+        # best first. The interval comes from the inverse Fisher information
+        # of the Bradley-Terry likelihood, with ratings centred on 0.
+        wins, games = self.scores()
+        theta = np.array([self.strengths.get(spec, 0.0) for spec in self.agents])
+        p = 1.0 / (1.0 + np.exp(theta[np.newaxis, :] - theta[:, np.newaxis]))
+        information = -games * p * (1.0 - p)
+        np.fill_diagonal(information, 0.0)
+        np.fill_diagonal(information, -information.sum(axis=1))
+        covariance = np.linalg.pinv(information)
+
+        table = []
+        for i, spec in enumerate(self.agents):
+            played = games[i].sum()
+            variance = covariance[i, i]
+            error = z * ELO_SCALE * math.sqrt(variance) if played and variance > 0 else math.inf
+            table.append((spec, ELO_SCALE * theta[i], error, int(played), wins[i].sum() / played if played else 0.0))
+        table.sort(key=lambda row: -row[1])
+        return table
+
+
+def print_ratings(league):
+    print(f"{'Agent':<24} {'Elo':>8} {'95% CI':>9} {'Games':>6} {'Score':>7}")
+    for spec, elo, error, games, score in league.ratings():
+        print(f"{spec:<24} {elo:8.1f} {'±' + format(error, '.1f'):>9} {games:6d} {score:7.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Round-robin league of Connect 4 agents with ratings.")
+    parser.add_argument("league", help="league JSON file, created if missing")
+    parser.add_argument("--add", action="append", default=[], metavar="SPEC", help="register an agent spec")
+    parser.add_argument("--games", type=int, default=0, help="games per pairing to play up to")
+    parser.add_argument("--workers", type=int, default=1, help="processes playing games in parallel")
+    parser.add_argument("--cache", type=int, default=0,
+                        help="move cache entries per worker for greedy and the minimax agents (0 disables)")
+    parser.add_argument("--seed", type=int, help="master seed of a new league")
+    parser.add_argument("--openings", type=int, default=0, metavar="PLIES", help="paired openings of a new league")
+    parser.add_argument("--log", metavar="PATH", help="append every game to this JSON Lines file")
+    args = parser.parse_args(argv)
+
+    league = League(args.league, args.seed, args.openings)
+    plies = league.opening_plies
+    if args.games and plies and opening_count(plies) < (args.games + 1) // 2:
+        parser.error(f"the league's {plies}-ply openings have at most {opening_count(plies)} distinct openings, "
+                     f"{(args.games + 1) // 2} are needed for --games {args.games}")
+    for spec in args.add:
+        try:
+            league.add_agent(spec)
+        except ValueError as error:
+            parser.error(str(error))
+    league.save()
+
+    if args.games:
+        league.play(args.games, args.workers, args.cache, log=args.log)
+    print_ratings(league)
+
+
+if __name__ == "__main__":
+    main()
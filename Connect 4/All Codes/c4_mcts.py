@@ -0,0 +1,352 @@
+import math
+import random
+
+from c4_bitboard import alignment, bitboards, drop_bit, forced_result, legal_columns, pieces, to_board
+from c4_board import AI_PIECE, COLUMN_COUNT, EMPTY, PLAYER_PIECE, MonteCarloTreeSearch, get_valid_locations, minimax
+from c4_nodes import NO_NODE, NO_WINNER, NodePool
+from c4_rollout import FastRollout, playout_buffer_size
+
+# minimax() scores wins at 1e14 (AI) and -1e13 (player), far beyond any heuristic
+WIN_SCORE = 10000000000000
+
+
+def rave_schedule(rave_k):
+    # Gelly & Silver's schedule: AMAF dominates while a node has few visits and
+    # fades out once n is well past rave_k.
+    def beta(visits):
+        return math.sqrt(rave_k / (3 * visits + rave_k))
+    return beta
+
+
+def reward(winner, piece):
+    if winner == piece:
+        return 1.0
+    elif winner == EMPTY:
+        return 0.5
+    return 0.0
+
+
+class FlatMonteCarloSearch(MonteCarloTreeSearch):
+    # The flat per-column search of MonteCarloTreeSearch on bitboards, with a
+    # pluggable playout policy (FastRollout or HeavyRollout).
+    def __init__(self, board, ai_piece, sim_count=1000, policy=None, rng=random, stats=None):
+        super().__init__(board, ai_piece, rng, stats)
+        self.sim_count = sim_count
+        if policy is None:
+            policy = FastRollout(playout_buffer_size(board, sim_count * COLUMN_COUNT), rng)
+        self.playouts = policy
+
+    def get_best_move(self):
+        valid_locations = get_valid_locations(self.board)
+        if not valid_locations:
+            return None
+
+        ai_bits, mask = bitboards(self.board)
+        best_move = None
+        best_score = -math.inf
+        rollouts, plies = self.playouts.rollouts, self.playouts.plies
+
+        for col in valid_locations:
+            bit = drop_bit(mask, col)
+            new_ai_bits = ai_bits | bit if self.ai_piece == AI_PIECE else ai_bits
+            if alignment(pieces(new_ai_bits, mask | bit, self.ai_piece)):
+                best_move = col
+                break
+            wins = 0
+            for _ in range(self.sim_count):
+                if self.playouts.playout(new_ai_bits, mask | bit, self.player_piece) == self.ai_piece:
+                    wins += 1
+
+            if wins > best_score:
+                best_score = wins
+                best_move = col
+
+        if self.stats is not None:
+            self.stats.rollouts += self.playouts.rollouts - rollouts
+            self.stats.rollout_plies += self.playouts.plies - plies
+        return best_move
+
+
+class TreeMonteCarloSearch(MonteCarloTreeSearch):
+    def __init__(self, board, ai_piece, iterations=1000, exploration=1.0, rave=True, rave_k=250, schedule=None,
+                 max_nodes=1 << 16, reuse_tree=True, prune_fraction=0.5, transpositions=False, policy=None, rng=random,
+                 stats=None):
+        super().__init__(board, ai_piece, rng, stats)
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rave = rave
+        self.schedule = schedule if schedule is not None else rave_schedule(rave_k)
+        self.nodes = NodePool(max_nodes, transpositions)
+        self.reuse_tree = reuse_tree
+        self.prune_fraction = prune_fraction
+        self.root = NO_NODE
+        self.root_bits = (0, 0)
+        self.pruned_nodes = 0
+        # One playout per iteration
+        self.playouts = policy if policy is not None else FastRollout(playout_buffer_size(board, iterations), rng)
+
+    def get_best_move(self):
+        valid_locations = get_valid_locations(self.board)
+        if not valid_locations:
+            return None
+
+        ai_bits, mask = bitboards(self.board)
+        key = ai_bits + mask
+        root = self.find_root(key) if self.reuse_tree else NO_NODE
+        if root != NO_NODE and self.nodes.winner[root] != NO_WINNER:
+            # A solved node has no children to choose from, search afresh
+            root = NO_NODE
+        if root != NO_NODE:
+            # Re-rooting: everything outside the new root's subtree is garbage
+            self.pruned_nodes += self.nodes.collect(root)
+        else:
+            self.nodes.clear()
+            root = self.nodes.allocate(-1, self.player_piece, key, legal_columns(mask), NO_WINNER)
+        self.root = root
+        self.root_bits = (ai_bits, mask)
+        rollouts, plies = self.playouts.rollouts, self.playouts.plies
+
+        for _ in range(self.iterations):
+            if len(self.nodes) >= self.nodes.capacity:
+                self.prune(root)
+            self.run_iteration(root)
+
+        if self.stats is not None:
+            self.stats.rollouts += self.playouts.rollouts - rollouts
+            self.stats.rollout_plies += self.playouts.plies - plies
+        return self.most_visited_move(root)
+
+    def find_root(self, key):
+        # The board passed in is usually the previous root plus our move and
+        # the opponent's reply, so only look two plies down.
+        nodes = self.nodes
+        if self.root == NO_NODE:
+            return NO_NODE
+        if nodes.table is not None:
+            return nodes.find(key)
+        frontier = [self.root]
+        for _ in range(3):
+            next_frontier = []
+            for node in frontier:
+                if nodes.key[node] == key:
+                    return node
+                for col in range(COLUMN_COUNT):
+                    child = nodes.child(node, col)
+                    if child != NO_NODE:
+                        next_frontier.append(child)
+            frontier = next_frontier
+        return NO_NODE
+
+    def prune(self, root):
+        # Cut the least visited edges below the root's children; the cut
+        # columns become untried again and can regrow. In a tree child visits
+        # never exceed the parent's, so a visit threshold removes whole
+        # subtrees. With transpositions a shared node collects visits from
+        # several parents and can outlive a cut edge; collect() keeps every
+        # node still reachable from the root either way.
+        nodes = self.nodes
+        edges = []
+        seen = {root}
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            base = node * COLUMN_COUNT
+            for col in range(COLUMN_COUNT):
+                child = nodes.children[base + col]
+                if child == NO_NODE or child in seen:
+                    continue
+                seen.add(child)
+                if depth > 0:
+                    edges.append((nodes.visits[child], node, col))
+                stack.append((child, depth + 1))
+        if not edges:
+            return 0
+
+        edges.sort()
+        threshold = edges[min(len(edges) - 1, int(len(edges) * self.prune_fraction))][0]
+        for visits, node, col in edges:
+            if visits > threshold:
+                break
+            nodes.children[node * COLUMN_COUNT + col] = NO_NODE
+            nodes.untried[node] |= 1 << col
+
+        released = nodes.collect(root)
+        self.pruned_nodes += released
+        return released
+
+    def most_visited_move(self, node):
+        nodes = self.nodes
+        best_move = None
+        best_visits = -1
+        for col in range(COLUMN_COUNT):
+            child = nodes.child(node, col)
+            if child != NO_NODE and nodes.visits[child] > best_visits:
+                best_visits = nodes.visits[child]
+                best_move = col
+        return best_move
+
+    def run_iteration(self, root):
+        nodes = self.nodes
+        ai_bits, mask = self.root_bits
+        node = root
+        path = [root]
+        moves = []
+
+        # Selection
+        while not nodes.untried[node] and nodes.winner[node] == NO_WINNER:
+            node, col = self.select_child(node)
+            bit = drop_bit(mask, col)
+            mask |= bit
+            if nodes.piece[node] == AI_PIECE:
+                ai_bits |= bit
+            moves.append((col, nodes.piece[node]))
+            path.append(node)
+        winner = nodes.winner[node]
+        to_move = 3 - nodes.piece[node]
+
+        # Expansion
+        untried = nodes.untried[node]
+        if untried:
+            col = self.rng.choice([c for c in range(COLUMN_COUNT) if untried >> c & 1])
+            piece = to_move
+            bit = drop_bit(mask, col)
+            mask |= bit
+            if piece == AI_PIECE:
+                ai_bits |= bit
+            moves.append((col, piece))
+            to_move = 3 - piece
+
+            # A transposition links the existing node instead of a new one
+            child = nodes.find(ai_bits + mask)
+            if child != NO_NODE:
+                winner = nodes.winner[child]
+                if self.stats is not None:
+                    self.stats.tt_hits += 1
+            else:
+                winner, child_untried = self.classify(ai_bits, mask, piece)
+                child = nodes.allocate(col, piece, ai_bits + mask, child_untried, winner)
+                if self.stats is not None and child != NO_NODE:
+                    self.stats.nodes += 1
+
+            # A full pool still scores the move, it just is not stored
+            if child != NO_NODE:
+                nodes.untried[node] = untried & ~(1 << col)
+                nodes.children[node * COLUMN_COUNT + col] = child
+                path.append(child)
+
+        # Simulation
+        if winner == NO_WINNER:
+            if self.stats is not None:
+                self.stats.leaf_evals += 1
+            value = self.evaluate_leaf(ai_bits, mask, to_move, moves if self.rave else None)
+        else:
+            value = reward(winner, AI_PIECE)
+
+        self.backpropagate(path, moves, value)
+
+    def classify(self, ai_bits, mask, piece):
+        # Winner and untried columns of the position `piece` just moved into
+        if alignment(pieces(ai_bits, mask, piece)):
+            return piece, 0
+        untried = legal_columns(mask)
+        return (NO_WINNER if untried else EMPTY), untried
+
+    def select_child(self, node):
+        nodes = self.nodes
+        log_visits = math.log(nodes.visits[node])
+        beta = self.schedule(nodes.visits[node]) if self.rave else 0.0
+        best_child = NO_NODE
+        best_col = None
+        best_value = -math.inf
+
+        base = node * COLUMN_COUNT
+        for col in range(COLUMN_COUNT):
+            child = nodes.children[base + col]
+            if child == NO_NODE:
+                continue
+            visits = nodes.visits[child]
+            value = nodes.wins[child] / visits
+            if beta > 0.0 and nodes.amaf_visits[child]:
+                value = (1.0 - beta) * value + beta * nodes.amaf_wins[child] / nodes.amaf_visits[child]
+            value += self.exploration * math.sqrt(log_visits / visits)
+            if value > best_value:
+                best_value = value
+                best_child = child
+                best_col = col
+
+        return best_child, best_col
+
+    def rollout(self, ai_bits, mask, piece, moves):
+        return self.playouts.playout(ai_bits, mask, piece, moves)
+
+    def evaluate_leaf(self, ai_bits, mask, piece, moves):
+        # Value of a non-terminal leaf for AI_PIECE, in [0, 1]
+        return reward(self.rollout(ai_bits, mask, piece, moves), AI_PIECE)
+
+    def backpropagate(self, path, moves, value):
+        # `value` is the result for AI_PIECE; PLAYER_PIECE nodes get 1 - value
+        nodes = self.nodes
+        # played[p] holds the columns p dropped into at or below the current
+        # node, so every sibling sharing one of those moves gets an AMAF update.
+        played = {PLAYER_PIECE: set(), AI_PIECE: set()}
+        for col, piece in moves[len(path) - 1:]:
+            played[piece].add(col)
+
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            nodes.visits[node] += 1
+            nodes.wins[node] += value if nodes.piece[node] == AI_PIECE else 1.0 - value
+
+            if self.rave:
+                mover = 3 - nodes.piece[node]
+                mover_reward = value if mover == AI_PIECE else 1.0 - value
+                base = node * COLUMN_COUNT
+                for col in played[mover]:
+                    child = nodes.children[base + col]
+                    if child != NO_NODE:
+                        nodes.amaf_visits[child] += 1
+                        nodes.amaf_wins[child] += mover_reward
+
+            if i > 0:
+                col, piece = moves[i - 1]
+                played[piece].add(col)
+
+
+class HybridMonteCarloSearch(TreeMonteCarloSearch):
+    # Tree MCTS with a shallow search at new leaves. mode="rollout" scores the
+    # leaf with the alpha-beta minimax() and score_position() from c4_board
+    # instead of a playout. mode="expansion" keeps the playouts but marks a
+    # new node as solved when one side forces a win within minimax_depth
+    # plies; that check only needs win detection, so it runs on bitboards.
+    def __init__(self, board, ai_piece, iterations=1000, minimax_depth=3, mode="expansion", score_scale=20.0,
+                 **kwargs):
+        super().__init__(board, ai_piece, iterations, **kwargs)
+        if mode not in ("rollout", "expansion"):
+            raise ValueError("mode must be 'rollout' or 'expansion'")
+        self.minimax_depth = minimax_depth
+        self.mode = mode
+        self.score_scale = score_scale
+
+    def evaluate_leaf(self, ai_bits, mask, piece, moves):
+        if self.mode == "expansion":
+            return super().evaluate_leaf(ai_bits, mask, piece, moves)
+
+        board = to_board(ai_bits, mask)
+        value = minimax(board, self.minimax_depth, -math.inf, math.inf, piece == AI_PIECE, rng=self.rng,
+                        stats=self.stats)[1]
+        if value >= WIN_SCORE:
+            return 1.0
+        elif value <= -WIN_SCORE:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(-value / self.score_scale))
+
+    def classify(self, ai_bits, mask, piece):
+        winner, untried = super().classify(ai_bits, mask, piece)
+        if self.mode == "expansion" and winner == NO_WINNER:
+            opp = pieces(ai_bits, mask, 3 - piece)
+            result = forced_result(opp, opp ^ mask, mask, self.minimax_depth)
+            if result == 1:
+                return 3 - piece, 0
+            elif result == -1:
+                return piece, 0
+        return winner, untried
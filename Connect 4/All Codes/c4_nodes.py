@@ -0,0 +1,103 @@
+from array import array
+
+from c4_board import COLUMN_COUNT
+
+# Search nodes are rows of parallel typed arrays instead of Python objects.
+# A node is an int index; child links live in a flat table with one slot per
+# column (node * COLUMN_COUNT + col), -1 meaning "not expanded".
+
+NO_NODE = -1
+NO_WINNER = -1
+
+
+class NodePool:
+    def __init__(self, capacity, transpositions=False):
+        self.capacity = capacity
+        # Position key -> node, so one position reached through different
+        # move orders is a single node with several parents.
+        self.table = {} if transpositions else None
+        self.size = 0
+        self.free = array('i')
+        self.visits = array('i', bytes(4 * capacity))
+        self.wins = array('d', bytes(8 * capacity))
+        self.amaf_visits = array('i', bytes(4 * capacity))
+        self.amaf_wins = array('d', bytes(8 * capacity))
+        self.children = array('i', [NO_NODE]) * (capacity * COLUMN_COUNT)
+        self.move = array('b', bytes(capacity))
+        self.piece = array('b', bytes(capacity))  # Piece that played `move`
+        self.winner = array('b', bytes(capacity))
+        self.untried = array('B', bytes(capacity))  # Bitmask of unexpanded columns
+        self.key = array('q', bytes(8 * capacity))
+
+    def __len__(self):
+        return self.size - len(self.free)
+
+    def clear(self):
+        self.size = 0
+        del self.free[:]
+        if self.table is not None:
+            self.table.clear()
+
+    def allocate(self, move, piece, key, untried, winner):
+        if self.free:
+            index = self.free.pop()
+        elif self.size < self.capacity:
+            index = self.size
+            self.size += 1
+        else:
+            return NO_NODE
+
+        self.visits[index] = 0
+        self.wins[index] = 0.0
+        self.amaf_visits[index] = 0
+        self.amaf_wins[index] = 0.0
+        base = index * COLUMN_COUNT
+        for slot in range(base, base + COLUMN_COUNT):
+            self.children[slot] = NO_NODE
+        self.move[index] = move
+        self.piece[index] = piece
+        self.winner[index] = winner
+        self.untried[index] = untried
+        self.key[index] = key
+        if self.table is not None:
+            self.table[key] = index
+        return index
+
+    def release(self, index):
+        if self.table is not None and self.table.get(self.key[index]) == index:
+            del self.table[self.key[index]]
+        self.free.append(index)
+
+    def find(self, key):
+        if self.table is None:
+            return NO_NODE
+        return self.table.get(key, NO_NODE)
+
+    def collect(self, root):
+        # Mark everything reachable from root and put every other live node
+        # back on the free list. Returns the number of nodes released.
+        marked = {root}
+        stack = [root]
+        while stack:
+            base = stack.pop() * COLUMN_COUNT
+            for slot in range(base, base + COLUMN_COUNT):
+                child = self.children[slot]
+                if child != NO_NODE and child not in marked:
+                    marked.add(child)
+                    stack.append(child)
+
+        free = set(self.free)
+        released = 0
+        for index in range(self.size):
+            if index not in marked and index not in free:
+                self.release(index)
+                released += 1
+        return released
+
+    def child(self, index, col):
+        return self.children[index * COLUMN_COUNT + col]
+
+    def nbytes(self):
+        arrays = (self.visits, self.wins, self.amaf_visits, self.amaf_wins, self.children, self.move, self.piece,
+                  self.winner, self.untried, self.key)
+        return sum(a.itemsize * len(a) for a in arrays)
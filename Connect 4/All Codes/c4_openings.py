@@ -0,0 +1,73 @@
+import random
+
+from c4_bitboard import alignment, drop_bit, forced_result, legal_columns
+from c4_board import COLUMN_COUNT
+
+# Balanced start positions for paired matches. An opening is a tuple of
+# columns played alternately from the empty board, first by the starter.
+# Every opening is used twice, once with each agent starting, so the
+# opening's own bias cancels out within the pair.
+
+
+def opening_bits(opening):
+    # (stones of the side to move, stones of the other side, mask), or None if
+    # a move is illegal or wins
+    me = opp = mask = 0
+    for col in opening:
+        if not legal_columns(mask) >> col & 1:
+            return None
+        bit = drop_bit(mask, col)
+        me |= bit
+        mask |= bit
+        if alignment(me):
+            return None
+        me, opp = opp, me
+    return me, opp, mask
+
+
+def is_balanced(opening, depth=6):
+    # Neither side can force a win within `depth` plies
+    bits = opening_bits(opening)
+    return bits is not None and forced_result(*bits, depth) == 0
+
+
+def random_opening(plies, rng=random):
+    return tuple(rng.randrange(COLUMN_COUNT) for _ in range(plies))
+
+
+def opening_count(plies):
+    # Distinct move sequences of `plies` moves, balanced or not: an upper
+    # bound on the distinct openings draw_openings() can find
+    return COLUMN_COUNT ** plies
+
+
+def draw_openings(count, plies=4, depth=6, rng=random, max_tries=1000, max_repeats=20):
+    # `count` balanced openings of `plies` random moves. They are distinct
+    # while random draws keep finding new ones; a short opening length may
+    # run out, and then openings repeat: after `max_repeats` draws of
+    # openings already taken, one of them is reused. Balance is searched
+    # once per distinct opening.
+    openings = []
+    seen = set()
+    balanced = {}
+    for _ in range(count):
+        candidate = None
+        repeats = 0
+        for _ in range(max_tries):
+            opening = random_opening(plies, rng)
+            if opening in seen:
+                candidate = opening
+                repeats += 1
+                if repeats >= max_repeats:
+                    break
+                continue
+            if opening not in balanced:
+                balanced[opening] = is_balanced(opening, depth)
+            if balanced[opening]:
+                candidate = opening
+                break
+        if candidate is None:
+            raise ValueError(f"no balanced {plies}-ply opening found in {max_tries} tries")
+        seen.add(candidate)
+        openings.append(candidate)
+    return openings
@@ -0,0 +1,115 @@
+import collections
+import cProfile
+import glob
+import os
+import sys
+import threading
+
+# Per-move profiles of agent decisions. The hook sits around agent.move()
+# in the game loop only, so with profiling off nothing inside the engines
+# (winning_move, score_position, simulate, ...) is wrapped or checked.
+#
+# mode="cprofile" writes a pstats file per move (<label>.prof, readable
+# with pstats or snakeviz). mode="sample" reads the searching thread's
+# stack every `interval` seconds from a background thread and writes
+# collapsed stacks (<label>.folded, one "f1;f2;f3 count" line per stack)
+# for flamegraph.pl or speedscope. Sampling only sees the thread when the
+# GIL switches, so the switch interval is lowered to `interval` meanwhile.
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.thread_id = None
+        self.base = None
+        self.thread = None
+        self.done = threading.Event()
+        self.switch_interval = None
+
+    def start(self):
+        # Stacks are cut at the caller's frame, so they start at what it calls
+        self.thread_id = threading.get_ident()
+        self.base = sys._getframe(1)
+        self.done.clear()
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.done.set()
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def sample(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None and frame is not self.base:
+                frames.append(frame)
+                frame = frame.f_back
+            # Skip samples of the caller itself and of stop()
+            if frame is None or not frames or frames[-1].f_code is StackSampler.stop.__code__:
+                continue
+            self.stacks[";".join(frame_name(frame) for frame in reversed(frames))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class MoveProfiler:
+    def __init__(self, directory, mode="cprofile", interval=0.001):
+        if mode not in ("cprofile", "sample"):
+            raise ValueError("mode must be 'cprofile' or 'sample'")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        # Set by the caller per game, e.g. "p0-g12", to keep file names unique
+        self.prefix = "game"
+
+    def path(self, agent, ply):
+        name = f"{self.prefix}-{agent}-ply{ply:02d}".replace(":", "_").replace(os.sep, "_")
+        return os.path.join(self.directory, name + (".prof" if self.mode == "cprofile" else ".folded"))
+
+    def run(self, agent, ply, func, *args):
+        # func(*args) under the profiler; the profile is written to path()
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args)
+            finally:
+                profile.dump_stats(self.path(agent, ply))
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            return func(*args)
+        finally:
+            sampler.stop()
+            sampler.write(self.path(agent, ply))
+
+
+def merge_folded(directory, agent=None, path=None):
+    # Adds up the per-move collapsed stacks in `directory` (only those of
+    # `agent` if given) and writes them to `path` if given
+    pattern = "*.folded" if agent is None else f"*-{agent.replace(':', '_')}-ply*.folded"
+    stacks = collections.Counter()
+    for name in glob.glob(os.path.join(directory, pattern)):
+        with open(name) as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                stacks[stack] += int(count)
+    if path is not None:
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+    return stacks
@@ -0,0 +1,220 @@
+import random
+
+from c4_bitboard import (BOTTOM, FULL_COLUMNS, TOP, alignment, bitboards, column_of, drop_bit, legal_columns, pieces,
+                         playable_cells, winning_cells)
+from c4_board import AI_PIECE, COLUMN_COUNT, EMPTY, PLAYER_PIECE, get_valid_locations
+
+# Random playouts on bitboards. Every draw reads a number in [0, 420) from a
+# prefilled buffer; 420 is divisible by 1..7, so MOVE_TABLE[legal][r] picks a
+# uniformly random legal column without calling the RNG per ply.
+
+DRAW_RANGE = 420
+
+# Draws prefilled by default; a rollout built for one search can ask for
+# playout_buffer_size() instead
+BUFFER_SIZE = 1 << 16
+
+MOVE_TABLE = []
+for _legal in range(FULL_COLUMNS + 1):
+    _columns = [col for col in range(COLUMN_COUNT) if _legal >> col & 1]
+    MOVE_TABLE.append(tuple(_columns[r % len(_columns)] for r in range(DRAW_RANGE)) if _columns else ())
+
+
+def playout_buffer_size(board, playouts, draws_per_ply=1):
+    # Enough draws for `playouts` playouts from `board`, each lasting at most
+    # one ply per empty cell, capped at BUFFER_SIZE. A short buffer only
+    # costs a refill, which continues the same stream of draws.
+    empty = max(1, board.ravel().tolist().count(EMPTY))
+    return min(BUFFER_SIZE, playouts * empty * draws_per_ply)
+
+
+class FastRollout:
+    def __init__(self, buffer_size=BUFFER_SIZE, rng=random):
+        self.rng = rng
+        self.buffer_size = buffer_size
+        # Running totals of playouts and the plies they played
+        self.rollouts = 0
+        self.plies = 0
+        self.refill()
+
+    def refill(self):
+        self.buffer = self.rng.choices(range(DRAW_RANGE), k=self.buffer_size)
+        self.index = 0
+
+    def playout(self, ai_bits, mask, piece, moves=None):
+        # Plays random moves starting with `piece` and returns the winning
+        # piece, or EMPTY for a full board. Played (col, piece) pairs are
+        # appended to `moves` when one is given.
+        me = pieces(ai_bits, mask, piece)
+        opp = me ^ mask
+        legal = legal_columns(mask)
+        buffer = self.buffer
+        index = self.index
+        size = self.buffer_size
+        # One draw per ply, so the plies are the draws taken from the buffer
+        self.rollouts += 1
+        self.plies -= index
+
+        while legal:
+            if index == size:
+                self.refill()
+                buffer = self.buffer
+                self.plies += index
+                index = 0
+            col = MOVE_TABLE[legal][buffer[index]]
+            index += 1
+
+            new_mask = mask | (mask + BOTTOM[col])
+            me |= new_mask ^ mask
+            mask = new_mask
+            if mask & TOP[col]:
+                legal &= ~(1 << col)
+            if moves is not None:
+                moves.append((col, piece))
+
+            # Only the mover can have just completed a line: vertical,
+            # horizontal and both diagonals, as in alignment()
+            m = me & (me >> 1)
+            won = m & (m >> 2)
+            if not won:
+                m = me & (me >> 7)
+                won = m & (m >> 14)
+            if not won:
+                m = me & (me >> 6)
+                won = m & (m >> 12)
+            if not won:
+                m = me & (me >> 8)
+                won = m & (m >> 16)
+            if won:
+                self.index = index
+                self.plies += index
+                return piece
+
+            me, opp = opp, me
+            piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+
+        self.index = index
+        self.plies += index
+        return EMPTY
+
+
+class HeavyRollout(FastRollout):
+    # Plays an immediate win when there is one, otherwise blocks the
+    # opponent's immediate win, otherwise a random column. With probability
+    # `randomness` a ply skips the tactics and is purely random.
+    def __init__(self, randomness=0.1, buffer_size=BUFFER_SIZE, rng=random):
+        super().__init__(buffer_size, rng)
+        self.randomness = randomness
+        self.random_draws = int(randomness * DRAW_RANGE)
+
+    def playout(self, ai_bits, mask, piece, moves=None):
+        me = pieces(ai_bits, mask, piece)
+        opp = me ^ mask
+        legal = legal_columns(mask)
+        random_draws = self.random_draws
+        buffer = self.buffer
+        index = self.index
+        size = self.buffer_size
+        plies = 0
+
+        while legal:
+            if index >= size - 1:
+                self.refill()
+                buffer = self.buffer
+                index = 0
+            tactical = buffer[index] >= random_draws
+            draw = buffer[index + 1]
+            index += 2
+
+            if tactical:
+                playable = playable_cells(mask)
+                cells = winning_cells(me, mask) & playable
+                if cells:
+                    if moves is not None:
+                        moves.append((column_of(cells & -cells), piece))
+                    self.index = index
+                    self.rollouts += 1
+                    self.plies += plies + 1
+                    return piece
+                # No move can win here, so the line test below is skipped
+                cells = winning_cells(opp, mask) & playable
+                col = column_of(cells & -cells) if cells else MOVE_TABLE[legal][draw]
+            else:
+                col = MOVE_TABLE[legal][draw]
+
+            new_mask = mask | (mask + BOTTOM[col])
+            me |= new_mask ^ mask
+            mask = new_mask
+            if mask & TOP[col]:
+                legal &= ~(1 << col)
+            if moves is not None:
+                moves.append((col, piece))
+
+            plies += 1
+            if not tactical and alignment(me):
+                self.index = index
+                self.rollouts += 1
+                self.plies += plies
+                return piece
+
+            me, opp = opp, me
+            piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+
+        self.index = index
+        self.rollouts += 1
+        self.plies += plies
+        return EMPTY
+
+
+_default_rollout = None
+
+
+def fast_simulate(board, piece, rollout=None):
+    # Bitboard counterpart of simulate(): `piece` moves first and the result
+    # is 1 for a `piece` win, -1 for a loss and 0 for a draw.
+    global _default_rollout
+    if rollout is None:
+        if _default_rollout is None:
+            _default_rollout = FastRollout()
+        rollout = _default_rollout
+
+    ai_bits, mask = bitboards(board)
+    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+    if alignment(pieces(ai_bits, mask, piece)):
+        return 1
+    if alignment(pieces(ai_bits, mask, opp_piece)):
+        return -1
+
+    winner = rollout.playout(ai_bits, mask, piece)
+    return 1 if winner == piece else -1 if winner == opp_piece else 0
+
+
+def fast_mcts_move(board, piece, n_simulations=100, rollout=None, rng=random, stats=None):
+    # mcts_move() on bitboards: the board is converted once and each column
+    # is scored by n_simulations playouts with the opponent to move.
+    if rollout is None:
+        rollout = FastRollout(playout_buffer_size(board, n_simulations * COLUMN_COUNT), rng)
+    rollouts, plies = rollout.rollouts, rollout.plies
+    valid_locations = get_valid_locations(board)
+    best_score = -float('inf')
+    best_col = rng.choice(valid_locations)
+    ai_bits, mask = bitboards(board)
+    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+
+    for col in valid_locations:
+        bit = drop_bit(mask, col)
+        new_ai_bits = ai_bits | bit if piece == AI_PIECE else ai_bits
+        if alignment(pieces(new_ai_bits, mask | bit, piece)):
+            best_col = col
+            break
+        score = 0
+        for _ in range(n_simulations):
+            winner = rollout.playout(new_ai_bits, mask | bit, opp_piece)
+            score += 1 if winner == piece else -1 if winner == opp_piece else 0
+        if score > best_score:
+            best_score = score
+            best_col = col
+    if stats is not None:
+        stats.rollouts += rollout.rollouts - rollouts
+        stats.rollout_plies += rollout.plies - plies
+    return best_col
@@ -0,0 +1,120 @@
+import math
+import random
+
+from c4_board import AI_PIECE, PLAYER_PIECE
+from c4_eval import IncrementalEvaluator
+
+# minimax() and h_minimax() from c4_board on an IncrementalEvaluator: one
+# evaluator is updated with play()/undo() instead of copying the board, and
+# leaves read the running score instead of rescoring all 69 windows.
+
+
+def incremental_minimax(evaluator, depth, alpha, beta, maximizingPlayer, rng=random, stats=None):
+    if stats is not None:
+        stats.nodes += 1
+    valid_locations = evaluator.valid_locations()
+    is_terminal = evaluator.is_terminal()
+    if depth == 0 or is_terminal:
+        if is_terminal:
+            if evaluator.winning(AI_PIECE):
+                return (None, 100000000000000)
+            elif evaluator.winning(PLAYER_PIECE):
+                return (None, -10000000000000)
+            else:  # Game is over, no more valid moves
+                return (None, 0)
+        else:  # Depth is zero
+            if stats is not None:
+                stats.leaf_evals += 1
+            return (None, evaluator.score(AI_PIECE))
+    if maximizingPlayer:
+        value = -math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            evaluator.play(col, AI_PIECE)
+            new_score = incremental_minimax(evaluator, depth - 1, alpha, beta, False, rng, stats)[1]
+            evaluator.undo(col)
+            if new_score > value:
+                value = new_score
+                column = col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+    else:  # Minimizing player
+        value = math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            evaluator.play(col, PLAYER_PIECE)
+            new_score = incremental_minimax(evaluator, depth - 1, alpha, beta, True, rng, stats)[1]
+            evaluator.undo(col)
+            if new_score < value:
+                value = new_score
+                column = col
+            beta = min(beta, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+
+
+def incremental_h_minimax(evaluator, depth, alpha, beta, maximizingPlayer, depth_limit=6, rng=random, stats=None):
+    if stats is not None:
+        stats.nodes += 1
+    valid_locations = evaluator.valid_locations()
+    is_terminal = evaluator.is_terminal()
+    if depth == 0 or is_terminal or depth == depth_limit:  # Depth limit added
+        if is_terminal:
+            if evaluator.winning(AI_PIECE):
+                return (None, 100000000000000)
+            elif evaluator.winning(PLAYER_PIECE):
+                return (None, -10000000000000)
+            else:
+                return (None, 0)
+        else:
+            if stats is not None:
+                stats.leaf_evals += 1
+            return (None, evaluator.score(AI_PIECE))
+    if maximizingPlayer:
+        value = -math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            evaluator.play(col, AI_PIECE)
+            new_score = incremental_h_minimax(evaluator, depth - 1, alpha, beta, False, depth_limit, rng, stats)[1]
+            evaluator.undo(col)
+            if new_score > value:
+                value = new_score
+                column = col
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+    else:
+        value = math.inf
+        column = rng.choice(valid_locations)
+        for col in valid_locations:
+            evaluator.play(col, PLAYER_PIECE)
+            new_score = incremental_h_minimax(evaluator, depth - 1, alpha, beta, True, depth_limit, rng, stats)[1]
+            evaluator.undo(col)
+            if new_score < value:
+                value = new_score
+                column = col
+            beta = min(beta, value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.add_cutoff(col == valid_locations[0])
+                break
+        return column, value
+
+
+def fast_minimax(board, depth, alpha, beta, maximizingPlayer, rng=random, stats=None):
+    return incremental_minimax(IncrementalEvaluator(board), depth, alpha, beta, maximizingPlayer, rng, stats)
+
+
+def fast_h_minimax(board, depth, alpha, beta, maximizingPlayer, depth_limit=6, rng=random, stats=None):
+    return incremental_h_minimax(IncrementalEvaluator(board), depth, alpha, beta, maximizingPlayer, depth_limit,
+                                 rng, stats)
@@ -0,0 +1,74 @@
+import math
+
+# Sequential probability ratio test on match results, in the generalized
+# (normal-approximation) form chess engine testers use for win/draw/loss
+# data. H0: the first agent is elo0 stronger than the second, H1: elo1
+# stronger. The match stops once the log-likelihood ratio leaves
+# [log(beta / (1 - alpha)), log((1 - beta) / alpha)].
+
+
+def expected_score(elo):
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def score_elo(score):
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+class SPRT:
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        if elo1 <= elo0:
+            raise ValueError("elo1 must be greater than elo0")
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = math.log(beta / (1.0 - alpha))
+        self.upper = math.log((1.0 - beta) / alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add(self, score):
+        # score of the first agent: 1 win, 0.5 draw, 0 loss
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def llr(self):
+        # Half a win and half a loss are added so that a clean sweep still has
+        # a variance; they shift the score towards 0.5 by half a game.
+        wins = self.wins + 0.5
+        losses = self.losses + 0.5
+        n = wins + self.draws + losses
+        score = (wins + 0.5 * self.draws) / n
+        variance = (wins * (1.0 - score) ** 2 + self.draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+        s0 = expected_score(self.elo0)
+        s1 = expected_score(self.elo1)
+        return n * (s1 - s0) * (2.0 * score - s0 - s1) / (2.0 * variance)
+
+    def status(self):
+        # "H1" or "H0" once accepted, None while the test continues
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def report(self):
+        games = self.games()
+        score = (self.wins + 0.5 * self.draws) / games if games else 0.5
+        return {"elo0": self.elo0, "elo1": self.elo1, "alpha": self.alpha, "beta": self.beta, "games": games,
+                "llr": self.llr(), "lower": self.lower, "upper": self.upper, "status": self.status(),
+                "elo": score_elo(score)}
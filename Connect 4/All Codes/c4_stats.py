@@ -0,0 +1,62 @@
+# Work counters for the engines. Every engine takes an optional `stats=`
+# SearchStats and adds to it as it searches; with the default None it
+# skips all counting.
+
+FIELDS = ("nodes", "leaf_evals", "cutoffs", "first_move_cutoffs", "tt_hits", "rollouts", "rollout_plies",
+          "searches", "search_depth", "elapsed_ns")
+
+
+class SearchStats:
+    # nodes               positions visited (minimax calls, new tree nodes)
+    # leaf_evals          heuristic evaluations and MCTS leaf evaluations
+    # cutoffs             alpha-beta cutoffs
+    # first_move_cutoffs  cutoffs caused by the first move tried
+    # tt_hits             cached or transposed positions reused
+    # rollouts            random playouts and their plies
+    # searches            fixed-depth searches and their summed depth,
+    #                     for the effective branching factor
+    # elapsed_ns          wall time, filled in by the caller
+    def __init__(self, **counts):
+        for field in FIELDS:
+            setattr(self, field, counts.get(field, 0))
+
+    def add_search(self, depth):
+        self.searches += 1
+        self.search_depth += depth
+
+    def add_cutoff(self, first_move):
+        self.cutoffs += 1
+        if first_move:
+            self.first_move_cutoffs += 1
+
+    def merge(self, other):
+        for field in FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        return self
+
+    def first_move_cutoff_ratio(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def effective_branching_factor(self):
+        # b with b ** depth = nodes for the average search
+        if not self.searches or not self.search_depth:
+            return 0.0
+        return (self.nodes / self.searches) ** (self.searches / self.search_depth)
+
+    def per_second(self, count):
+        return count * 1e9 / self.elapsed_ns if self.elapsed_ns else 0.0
+
+    def to_dict(self):
+        counts = {field: getattr(self, field) for field in FIELDS}
+        counts["first_move_cutoff_ratio"] = self.first_move_cutoff_ratio()
+        counts["effective_branching_factor"] = self.effective_branching_factor()
+        counts["nodes_per_second"] = self.per_second(self.nodes)
+        counts["rollouts_per_second"] = self.per_second(self.rollouts)
+        return counts
+
+    @classmethod
+    def from_dict(cls, counts):
+        return cls(**{field: counts.get(field, 0) for field in FIELDS})
+
+    def __repr__(self):
+        return "SearchStats(" + ", ".join(f"{field}={getattr(self, field)}" for field in FIELDS) + ")"
@@ -0,0 +1,424 @@
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from c4_agents import CachedAgent, derive_seed, make_agent
+from c4_board import (AI, AI_PIECE, PLAYER, PLAYER_PIECE, create_board, drop_piece, get_next_open_row,
+                      get_valid_locations, is_valid_location, winning_move_at)
+from c4_cache import MoveCache
+from c4_latency import LatencyTracker, print_latencies
+from c4_openings import draw_openings, opening_count
+from c4_profile import MoveProfiler, merge_folded
+from c4_sprt import SPRT
+from c4_stats import SearchStats
+
+# Command-line runner for the 100-game matchups of the scripts: every pair
+# of agent specs plays --games games, spread over a pool of --workers
+# processes, e.g.
+#
+#   python c4_tournament.py minimax:5 mcts:100 --games 100 --workers 8
+#
+# Game i of a pairing runs on its own RNG seeded from (master seed, pairing,
+# i); that stream picks the starter and feeds the random and MC agents, so
+# any game can be replayed alone with --replay i and the same --seed.
+# The deterministic agents (greedy, the minimax family) run on a seed of
+# their own instead.
+# --cache N reuses their decisions for repeated positions without changing
+# any game.
+# With --sprt a pairing stops as soon as its sequential test is decided.
+# With --openings games 2k and 2k+1 start from the same balanced random
+# opening with the other agent starting.
+# With --log every finished game is appended to a JSON Lines file, and a
+# rerun with the same file skips the games in it.
+# --latency reports per-move think time percentiles by game phase and
+# --profile DIR writes a cProfile or sampled-stack profile of every move.
+
+
+def play_game(player_agent, ai_agent, starter, rng=random, opening=(), profiler=None):
+    # One game from the empty board; player_agent drops PLAYER_PIECE and
+    # ai_agent AI_PIECE, `starter` is PLAYER or AI as in the scripts. The
+    # columns of `opening` are played first, alternately from the starter.
+    # A c4_profile.MoveProfiler profiles every move decision.
+    board = create_board()
+    agents = {PLAYER: player_agent, AI: ai_agent}
+    pieces = {PLAYER: PLAYER_PIECE, AI: AI_PIECE}
+    times = {PLAYER: 0, AI: 0}
+    stats = {PLAYER: SearchStats(), AI: SearchStats()}
+    moves = []
+    move_ns = []
+    nodes = []
+    winner = None
+    turn = starter
+
+    for col in opening:
+        drop_piece(board, get_next_open_row(board, col), col, pieces[turn])
+        moves.append(col)
+        turn = 1 - turn
+
+    while get_valid_locations(board):
+        move_stats = SearchStats()
+        start_ns = time.perf_counter_ns()
+        if profiler is None:
+            col, _ = agents[turn].move(board, pieces[turn], rng, move_stats)
+        else:
+            col, _ = profiler.run(agents[turn].config, len(moves), agents[turn].move, board, pieces[turn], rng,
+                                  move_stats)
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        move_stats.elapsed_ns = elapsed_ns
+        stats[turn].merge(move_stats)
+        times[turn] += elapsed_ns
+        move_ns.append(elapsed_ns)
+        nodes.append(move_stats.nodes)
+        if col is None or not is_valid_location(board, col):
+            raise ValueError(f"{agents[turn]!r} returned an invalid column {col!r}")
+        row = get_next_open_row(board, col)
+        drop_piece(board, row, col, pieces[turn])
+        moves.append(col)
+        if winning_move_at(board, row, col, pieces[turn]):
+            winner = turn
+            break
+        turn = 1 - turn
+
+    # times are seconds per side and stats the SearchStats totals per side;
+    # move_ns and nodes have one entry per move after the opening
+    return {"starter": starter, "opening": list(opening), "winner": winner, "moves": moves,
+            "times": [times[PLAYER] / 1e9, times[AI] / 1e9], "move_ns": move_ns, "nodes": nodes,
+            "stats": [stats[PLAYER].to_dict(), stats[AI].to_dict()]}
+
+
+# Per-process state of the pool workers: agents are built once per process
+# and share one move cache across all the games that process plays.
+_worker = {}
+
+
+def init_worker(cache_size, profile=None, master_seed=0):
+    # profile: None, or MoveProfiler arguments (directory, mode, interval)
+    _worker["cache"] = MoveCache(cache_size) if cache_size else None
+    _worker["agents"] = {}
+    _worker["profiler"] = MoveProfiler(*profile) if profile is not None else None
+    _worker["master_seed"] = master_seed
+
+
+def agent_seed(master_seed, spec):
+    return derive_seed(master_seed, "agent", spec)
+
+
+def worker_agent(spec):
+    # Deterministic agents are seeded from the master seed with or without
+    # the cache, so they never draw from the game's rng and cached and
+    # uncached runs play the same games. Only they are cached.
+    agents = _worker["agents"]
+    if spec not in agents:
+        agent = make_agent(spec)
+        if agent.deterministic:
+            agent.seed = agent_seed(_worker["master_seed"], spec)
+            if _worker["cache"] is not None:
+                agent = CachedAgent(agent, _worker["cache"])
+        agents[spec] = agent
+    return agents[spec]
+
+
+def game_seed(master_seed, player_spec, ai_spec, index):
+    return derive_seed(master_seed, player_spec, ai_spec, index)
+
+
+def match_openings(master_seed, n_games, plies, depth=6):
+    # One opening per pair of games, the same for every pairing of a run
+    rng = random.Random(derive_seed(master_seed, "openings", plies, depth))
+    return draw_openings((n_games + 1) // 2, plies, depth, rng)
+
+
+def play_seeded_game(player_agent, ai_agent, seed, starter=None, opening=(), profiler=None):
+    # starter=None draws the starter from the game's stream like the scripts
+    rng = random.Random(seed)
+    if starter is None:
+        starter = rng.randint(PLAYER, AI)
+    result = play_game(player_agent, ai_agent, starter, rng, opening, profiler)
+    result["seed"] = seed
+    return result
+
+
+def make_task(pairing, index, player_spec, ai_spec, master_seed, openings=None):
+    task = {"pairing": pairing, "index": index, "agents": [player_spec, ai_spec],
+            "seed": game_seed(master_seed, player_spec, ai_spec, index), "starter": None, "opening": ()}
+    if openings is not None:
+        task["opening"] = openings[index // 2]
+        task["starter"] = PLAYER if index % 2 == 0 else AI
+    return task
+
+
+def play_task(task):
+    player_spec, ai_spec = task["agents"]
+    profiler = _worker["profiler"]
+    if profiler is not None:
+        profiler.prefix = f"p{task['pairing']}-g{task['index']}"
+    result = play_seeded_game(worker_agent(player_spec), worker_agent(ai_spec), task["seed"], task["starter"],
+                              task["opening"], profiler)
+    result["pairing"] = task["pairing"]
+    result["index"] = task["index"]
+    result["agents"] = task["agents"]
+    return result
+
+
+def task_key(task):
+    # Identifies a game across runs; the seed pins the master seed too
+    return tuple(task["agents"]), task["index"], task["seed"]
+
+
+def read_log(path):
+    # Records of a results log; a line cut short by a crash is ignored
+    records = []
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+    return records
+
+
+def open_log(path):
+    # Opens a results log for appending. A line cut short by a crash is
+    # ended first, so the next record does not run into it.
+    log_file = open(path, "a")
+    if log_file.tell():
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                log_file.write("\n")
+    return log_file
+
+
+def play_tasks(tasks, workers=1, cache_size=0, skip=None, done=None, profile=None, master_seed=0):
+    # Yields results in task order. Tasks are handed to the pool lazily, two
+    # per worker ahead, and one is dropped if skip(task) is true by then.
+    # Tasks found in `done` (task_key -> result) are not played again.
+    def finished(task):
+        return dict(done[task_key(task)], pairing=task["pairing"])
+
+    tasks = (task for task in tasks if skip is None or not skip(task))
+    done = done or {}
+    if workers <= 1:
+        init_worker(cache_size, profile, master_seed)
+        for task in tasks:
+            yield finished(task) if task_key(task) in done else play_task(task)
+        return
+
+    with multiprocessing.Pool(workers, init_worker, (cache_size, profile, master_seed)) as pool:
+        pending = collections.deque()
+        while True:
+            while len(pending) < 2 * workers:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                if task_key(task) in done:
+                    pending.append(finished(task))
+                else:
+                    pending.append(pool.apply_async(play_task, (task,)))
+            if not pending:
+                break
+            result = pending.popleft()
+            yield result if isinstance(result, dict) else result.get()
+
+
+def new_summary(player_spec, ai_spec):
+    return {"agents": [player_spec, ai_spec], "games": 0, "wins": [0, 0], "starts": [0, 0], "draws": 0,
+            "times": [0.0, 0.0], "stats": [SearchStats().to_dict(), SearchStats().to_dict()]}
+
+
+def add_result(summary, result):
+    summary["games"] += 1
+    summary["starts"][result["starter"]] += 1
+    if result["winner"] is None:
+        summary["draws"] += 1
+    else:
+        summary["wins"][result["winner"]] += 1
+    for side in (PLAYER, AI):
+        summary["times"][side] += result["times"][side]
+        total = SearchStats.from_dict(summary["stats"][side]).merge(SearchStats.from_dict(result["stats"][side]))
+        summary["stats"][side] = total.to_dict()
+
+
+def run_tournament(specs, n_games=100, workers=1, cache_size=0, master_seed=0, sprt=None, opening_plies=0,
+                   on_result=None):
+    # Plays n_games for every pair of specs and returns one summary per pair.
+    # sprt() returns a fresh SPRT for each pairing, which then stops once
+    # its test is decided. opening_plies > 0 plays paired openings of that
+    # many plies. on_result(result, summary) is called as each game finishes.
+    return run_pairings(list(itertools.combinations(specs, 2)), n_games, workers, cache_size, master_seed, sprt,
+                        opening_plies, on_result)
+
+
+def run_pairings(pairings, n_games=100, workers=1, cache_size=0, master_seed=0, sprt=None, opening_plies=0,
+                 on_result=None, played=None, log=None, profile=None):
+    # run_tournament() for a list of (player_spec, ai_spec) pairings; games
+    # 0 .. played[i] - 1 of pairing i are taken as done and skipped. Games
+    # are appended to the JSON Lines file `log`, and games already in it
+    # count towards the summaries without being played again. `profile`
+    # turns on per-move profiling, see init_worker().
+    summaries = [new_summary(player_spec, ai_spec) for player_spec, ai_spec in pairings]
+    tests = [sprt() for _ in pairings] if sprt is not None else None
+    stopped = [False] * len(pairings)
+    openings = match_openings(master_seed, n_games, opening_plies) if opening_plies else None
+    # Games are interleaved across pairings so an early stop frees workers
+    if played is None:
+        played = [0] * len(pairings)
+    tasks = [make_task(i, index, player_spec, ai_spec, master_seed, openings)
+             for index in range(n_games) for i, (player_spec, ai_spec) in enumerate(pairings) if index >= played[i]]
+
+    done = {}
+    if log is not None:
+        for record in read_log(log):
+            done[task_key(record)] = record
+    log_file = open_log(log) if log is not None else None
+
+    try:
+        for result in play_tasks(tasks, workers, cache_size, lambda task: stopped[task["pairing"]], done, profile,
+                                 master_seed):
+            if log_file is not None and task_key(result) not in done:
+                record = dict(result, master_seed=master_seed)
+                del record["pairing"]
+                log_file.write(json.dumps(record) + "\n")
+                log_file.flush()
+
+            pairing = result["pairing"]
+            if stopped[pairing]:
+                continue  # already in flight when the test finished
+            summary = summaries[pairing]
+            add_result(summary, result)
+            if tests is not None:
+                test = tests[pairing]
+                test.add(0.5 if result["winner"] is None else 1 if result["winner"] == PLAYER else 0)
+                summary["sprt"] = test.report()
+                stopped[pairing] = test.status() is not None
+            if on_result is not None:
+                on_result(result, summary)
+    finally:
+        if log_file is not None:
+            log_file.close()
+    return summaries
+
+
+def print_summary(summary, stats=False):
+    for side, name in enumerate(summary["agents"]):
+        print(f"{name}: {summary['wins'][side]} wins, {summary['starts'][side]} starts, "
+              f"Total Time: {summary['times'][side]:.6f} seconds")
+    print(f"Draws: {summary['draws']}")
+    if stats:
+        for side, name in enumerate(summary["agents"]):
+            counts = summary["stats"][side]
+            print(f"{name}: {counts['nodes']} nodes ({counts['nodes_per_second']:.0f}/s), "
+                  f"{counts['leaf_evals']} leaf evals, {counts['cutoffs']} cutoffs "
+                  f"({counts['first_move_cutoff_ratio']:.1%} first move), {counts['tt_hits']} TT hits, "
+                  f"{counts['rollouts']} rollouts ({counts['rollouts_per_second']:.0f}/s, "
+                  f"{counts['rollout_plies']} plies), EBF {counts['effective_branching_factor']:.2f}")
+    if "sprt" in summary:
+        sprt = summary["sprt"]
+        verdict = {"H1": f"H1 accepted (elo >= {sprt['elo1']:g})", "H0": f"H0 accepted (elo <= {sprt['elo0']:g})",
+                   None: "inconclusive"}[sprt["status"]]
+        print(f"SPRT: LLR {sprt['llr']:.3f} [{sprt['lower']:.3f}, {sprt['upper']:.3f}] after {sprt['games']} games, "
+              f"{verdict}, elo {sprt['elo']:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Connect 4 agents against each other.")
+    parser.add_argument("agents", nargs="+",
+                        help="agent specs such as random, greedy, minimax:5, h_minimax:5:6, mcts:100")
+    parser.add_argument("--games", type=int, default=100, help="games per pair of agents")
+    parser.add_argument("--workers", type=int, default=1, help="processes playing games in parallel")
+    parser.add_argument("--cache", type=int, default=0,
+                        help="move cache entries per worker for greedy and the minimax agents (0 disables); "
+                             "random and MC agents are never cached")
+    parser.add_argument("--seed", type=int, help="master seed (default: a fresh one, printed)")
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"),
+                        help="stop a pairing early once H0: elo <= ELO0 or H1: elo >= ELO1 is accepted "
+                             "(elo of the first agent over the second)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT false negative rate")
+    parser.add_argument("--openings", type=int, default=0, metavar="PLIES",
+                        help="play each balanced random opening of PLIES moves twice, swapping the starter")
+    parser.add_argument("--log", metavar="PATH",
+                        help="append every game to this JSON Lines file and skip the games already in it")
+    parser.add_argument("--stats", action="store_true", help="print search counters per agent")
+    parser.add_argument("--latency", action="store_true", help="print move latency percentiles per game phase")
+    parser.add_argument("--latency-json", metavar="PATH", help="write the move latency histograms to PATH")
+    parser.add_argument("--profile", metavar="DIR", help="write a profile of every move decision to DIR")
+    parser.add_argument("--profile-mode", choices=("cprofile", "sample"), default="cprofile",
+                        help="cProfile .prof files, or sampled collapsed stacks (.folded) for flamegraphs")
+    parser.add_argument("--profile-interval", type=float, default=0.001, help="seconds between stack samples")
+    parser.add_argument("--replay", type=int, metavar="INDEX", help="replay only game INDEX of a two-agent match")
+    args = parser.parse_args(argv)
+    if len(args.agents) < 2:
+        parser.error("at least two agents are needed")
+    if args.replay is not None and len(args.agents) != 2:
+        parser.error("--replay needs exactly two agents")
+    if args.sprt is not None and args.sprt[1] <= args.sprt[0]:
+        parser.error("--sprt needs ELO0 < ELO1")
+    if args.openings and opening_count(args.openings) < (args.games + 1) // 2:
+        parser.error(f"--openings {args.openings} has at most {opening_count(args.openings)} distinct openings, "
+                     f"{(args.games + 1) // 2} are needed for --games {args.games}")
+    for spec in args.agents:
+        try:
+            make_agent(spec)
+        except ValueError as error:
+            parser.error(str(error))
+
+    master_seed = args.seed
+    if master_seed is None and args.log is not None:
+        # Resuming a log without --seed continues its run
+        records = read_log(args.log)
+        master_seed = records[0]["master_seed"] if records else None
+    if master_seed is None:
+        master_seed = random.getrandbits(32)
+    print(f"Seed: {master_seed}")
+
+    profile = None
+    if args.profile is not None:
+        profile = (args.profile, args.profile_mode, args.profile_interval)
+
+    if args.replay is not None:
+        init_worker(args.cache, profile, master_seed)
+        player_spec, ai_spec = args.agents
+        openings = match_openings(master_seed, args.replay + 1, args.openings) if args.openings else None
+        task = make_task(0, args.replay, player_spec, ai_spec, master_seed, openings)
+        result = play_task(task)
+        winner = "draw" if result["winner"] is None else args.agents[result["winner"]]
+        print(f"Game {args.replay}: {args.agents[result['starter']]} starts, winner {winner}")
+        print("Moves:", " ".join(str(col) for col in result["moves"]))
+        return
+
+    sprt = None
+    if args.sprt is not None:
+        elo0, elo1 = args.sprt
+
+        def sprt():
+            return SPRT(elo0, elo1, args.alpha, args.beta)
+
+    latencies = LatencyTracker()
+    start_time = time.perf_counter()
+    summaries = run_pairings(list(itertools.combinations(args.agents, 2)), args.games, args.workers, args.cache,
+                             master_seed, sprt, args.openings, lambda result, _: latencies.add_game(result),
+                             log=args.log, profile=profile)
+    for summary in summaries:
+        print_summary(summary, args.stats)
+        print()
+    if args.latency:
+        print_latencies(latencies)
+        print()
+    if args.latency_json is not None:
+        latencies.save(args.latency_json)
+    if args.profile is not None and args.profile_mode == "sample":
+        # One flamegraph input per agent on top of the per-move files
+        for spec in args.agents:
+            merge_folded(args.profile, spec, os.path.join(args.profile, spec.replace(":", "_") + ".folded"))
+    print(f"Wall time: {time.perf_counter() - start_time:.6f} seconds")
+
+
+if __name__ == "__main__":
+    main()